@@ -1,36 +1,136 @@
-import pandas as pd
-from dash import Dash, dcc, html, Input, Output
-import plotly.express as px
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from flask import Response, abort, jsonify, request, stream_with_context
+from dash import (
+    Dash, Patch, ctx, dcc, html, no_update, Input, Output, State, ClientsideFunction
+)
+from dash.exceptions import PreventUpdate
 import plotly.graph_objects as go
+# Imported up front: Dash serializes responses through plotly, which
+# uses pandas if it is in sys.modules — a half-imported pandas (from the
+# loader thread) would break requests served meanwhile
+import numpy as np
+import pandas as pd
 
-# utils
-from utils.prepare import load_question
-from utils.options import get_class_options, get_topic_options, get_question_options
-from utils.aggregation import (
-    aggregate_overall,
-    aggregate_gender,
-    aggregate_age,
-    aggregate_race,
-    aggregate_education,
-    aggregate_income,
-    aggregate_temporal,
-    aggregate_state
+# utils (the data stack — pyarrow, plotly.express, the ingest and
+# aggregation modules — is imported in the loader thread or on first use)
+from utils.config import (
+    DATA_CSV, CACHE_DIR, METRICS_LOCAL_ONLY, PREFETCH_TABS, WARM_TOP_N, WARM_TOPICS,
+    COMPARE_MAX_QUESTIONS, JOB_POLL_MS
 )
+from utils.jobs import JobQueue
+from utils.metrics import background, instrument, stage, registry, gauge
+from utils.warmup import AccessLog, Warmer
 
 # =========================================================
-# LOAD CSV (NO FILTERS!)
+# LOAD DATA (in the background; the server binds right away)
 # =========================================================
-df = pd.read_csv(
-    "/Users/swapnanilbala/Documents/Behavioral_Risk_Factor_Surveillance_System_(BRFSS)_Prevalence_Data_(2011_to_present)_20251129.csv",
-    low_memory=False
-)
-
-class_options = get_class_options(df)
+logging.basicConfig(level=logging.INFO)
+STARTED = time.time()
+
+# Dataset, option tree, aggregate cube, question + figure caches
+# (utils/refresh.py). None until the background load finishes (see
+# /readyz); replaced as a whole when `python -m utils.refresh` lands new
+# data (checked every BRFSS_REFRESH_POLL_S seconds).
+data = None
+data_loaded = threading.Event()
+load_error = None
+ready_seconds = None
+
+
+def swap_data(new):
+    global data
+    data = new
+    logging.info("Now serving dataset %s", new.fingerprint)
+
+
+def load_data():
+    global load_error, ready_seconds
+    try:
+        from utils.refresh import LiveData, watch
+        swap_data(LiveData.load(DATA_CSV))
+        ready_seconds = time.time() - STARTED
+        logging.info("Data ready %.1fs after start", ready_seconds)
+        watch(lambda: data, swap_data)
+        warm_questions(access_log.top(WARM_TOP_N), PANEL_FIGURES)
+    except Exception as e:
+        load_error = repr(e)
+        logging.exception("Loading %s failed", DATA_CSV)
+    finally:
+        data_loaded.set()
+
+
+def wait_ready(timeout=None):
+    """Block until the background load is done; the LiveData, or None if it failed."""
+    data_loaded.wait(timeout)
+    return data
+
+
+def current():
+    """The LiveData for a callback (no update while data is still loading)."""
+    d = data
+    if d is None:
+        raise PreventUpdate
+    return d
 
 # =========================================================
 # HELPERS
 # =========================================================
 
+def get_panel(q, panel, window=None):
+    from utils.options import has_panel_data
+
+    d = current()
+    if not has_panel_data(d.option_tree, q, panel):
+        return pd.DataFrame()
+    if window is not None:
+        return d.year_cache.window(q, panel, *window)
+    if d.cube is not None:
+        with stage("cube_lookup") as st:
+            summary = d.cube.get(q, panel)
+            st["rows"] = len(summary)
+        return summary
+    return d.backend.panel(q, panel)
+
+
+def year_window(years, d=None):
+    """[first, last] year of the year-range slider, or None when it spans every year."""
+    from utils.options import tree_years
+
+    d = d or data
+    full = tree_years(d.option_tree) if d is not None else []
+    if not years or not full or (years[0] <= full[0] and years[1] >= full[-1]):
+        return None
+    return [int(years[0]), int(years[1])]
+
+
+def panel_key(q, panel, window=None):
+    """Figure cache key of a panel (all years: the plain (question, panel))."""
+    return (q, panel) if window is None else (q, panel, *window)
+
+
+def year_slider(d):
+    """RangeSlider settings for LiveData d (disabled while loading / without years)."""
+    from utils.options import tree_years
+
+    years = tree_years(d.option_tree) if d is not None else []
+    if not years:
+        return {"min": 0, "max": 0, "value": [0, 0], "marks": {}, "disabled": True}
+    step = max(1, -(-len(years) // 12))
+    return {"min": years[0], "max": years[-1], "value": [years[0], years[-1]],
+            "marks": {y: str(y) for y in years[::step] + years[-1:]}, "disabled": False}
+
+
+def class_dropdown_options(d):
+    from utils.options import tree_class_options
+    return [{"label": c, "value": c} for c in tree_class_options(d.option_tree)]
+
+
 def apply_filter(summary, mode):
     if summary.empty:
         return summary
@@ -42,6 +142,16 @@ def apply_filter(summary, mode):
 
 
 def build_ci_bar(summary, x_col, title):
+    import plotly.express as px
+
+    # Per-point error bars (aligned with each Response trace). customdata
+    # is [row, ci_low, ci_high]: int row ids would turn it into float64,
+    # float32 holds them exactly (below 2**24)
+    summary = summary.assign(
+        ci_plus=summary["ci_high"] - summary["percent"],
+        ci_minus=summary["percent"] - summary["ci_low"],
+        row=summary["row"].astype("float32")
+    )
     fig = px.bar(
         summary,
         x=x_col,
@@ -49,27 +159,37 @@ def build_ci_bar(summary, x_col, title):
         color="Response",
         barmode="group",
         title=title,
+        error_y="ci_plus",
+        error_y_minus="ci_minus",
+        custom_data=["row"],
         hover_data={"percent":":.2f","ci_low":":.2f","ci_high":":.2f"}
     )
-
-    fig.update_traces(
-        error_y=dict(
-            symmetric=False,
-            array=summary["ci_high"] - summary["percent"],
-            arrayminus=summary["percent"] - summary["ci_low"]
-        )
-    )
     fig.update_layout(yaxis_title="Percent (%)")
     return fig
 
 
+def best_per_state(summary):
+    """Row of the highest percent per valid state: one vectorized argmax per group."""
+    summary = summary[summary["Locationabbr"].str.len() == 2]  # keep only valid states
+    codes, _ = pd.factorize(summary["Locationabbr"])
+    pct = summary["percent"].to_numpy(dtype="float64", na_value=np.nan)
+    if not len(codes):
+        return summary
+    top = np.full(codes.max() + 1, -np.inf)
+    np.fmax.at(top, codes, pct)               # NaN-ignoring max per state
+    hit = np.flatnonzero(pct == top[codes])
+    _, first = np.unique(codes[hit], return_index=True)
+    return summary.iloc[hit[first]]
+
+
 def build_geo_map(summary):
     """Option B — pick the HIGHEST RESPONSE per state."""
     if summary.empty:
         return go.Figure(layout={"title": "No state-level data available"})
 
-    best = summary.sort_values("percent", ascending=False).groupby("Locationabbr").head(1)
-    best = best[best["Locationabbr"].str.len() == 2]  # keep only valid states
+    import plotly.express as px
+
+    best = best_per_state(summary)
 
     fig = px.choropleth(
         best,
@@ -79,6 +199,7 @@ def build_geo_map(summary):
         scope="usa",
         color_continuous_scale="Plasma",
         hover_name="Locationabbr",
+        custom_data=["row"],
         title="State-Level Prevalence (Highest Response per State)"
     )
     fig.update_layout(margin={"l":0,"r":0,"t":50,"b":0})
@@ -89,190 +210,267 @@ def build_geo_map(summary):
 # DASH APP
 # =========================================================
 app = Dash(__name__)
+server = app.server   # WSGI entry point: gunicorn -w 8 app:server
 
-app.layout = html.Div(style={'padding': '20px'}, children=[
 
-    html.H1("BRFSS Interactive Dashboard"),
-
-    # -------------------- TOP DROPDOWNS --------------------
-    html.Div(style={'display': 'flex', 'gap': '15px'}, children=[
-        dcc.Dropdown(
-            id="class-dd",
-            options=[{"label": c, "value": c} for c in class_options],
-            placeholder="Select Class",
-            style={'width': '30%'}
-        ),
+def panel_tab(panel, label, graph_id):
+    return dcc.Tab(label=label, value=panel, children=[
+        html.Br(),
         dcc.Dropdown(
-            id="topic-dd",
-            placeholder="Select Topic",
-            style={'width': '30%'}
+            id=f"{panel}-filter",
+            options=[
+                {"label": "Show All", "value": "all"},
+                {"label": "More (Top 3)", "value": "more"},
+                {"label": "Less (Bottom 3)", "value": "less"}
+            ],
+            value="all",
+            style={'width': '25%'}
         ),
-        dcc.Dropdown(
-            id="question-dd",
-            placeholder="Select Question",
-            style={'width': '40%'}
-        ),
-    ]),
-
-    html.Div(
-        id="selected-question-display",
-        style={
-            'marginTop':'20px',
-            'fontSize':'20px',
-            'fontWeight':'bold',
-            'background':'#000',
-            'color':'white',
-            'padding':'10px',
-            'borderRadius':'8px'
-        }
-    ),
-
-    html.Hr(),
-
-    # -------------------- TABS --------------------
-    dcc.Tabs(id="tabs", children=[
-
-        # ==================== OVERALL ====================
-        dcc.Tab(label="Overall", children=[
-            html.Br(),
-            dcc.Dropdown(
-                id="overall-filter",
-                options=[
-                    {"label": "Show All", "value": "all"},
-                    {"label": "More (Top 3)", "value": "more"},
-                    {"label": "Less (Bottom 3)", "value": "less"}
-                ],
-                value="all",
-                style={'width': '25%'}
-            ),
-            dcc.Graph(id="overall-plot")
-        ]),
+        # full figure + summary rows (filtered in the browser), and the
+        # question (and dataset) they belong to
+        dcc.Store(id=f"{panel}-full"),
+        dcc.Store(id=f"{panel}-rows"),
+        dcc.Store(id=f"{panel}-rendered"),
+        dcc.Graph(id=graph_id)
+    ])
+
+
+# Panels the Compare tab offers (the state panel as bars, not a map)
+COMPARE_PANELS = {
+    "overall": "Overall", "gender": "Gender", "age": "Age", "race": "Race",
+    "education": "Education", "income": "Income", "temporal": "Temporal",
+    "state": "State / Territory",
+}
 
-        # ==================== GENDER ====================
-        dcc.Tab(label="Gender", children=[
-            html.Br(),
+
+def compare_tab():
+    return dcc.Tab(label="Compare", value="compare", children=[
+        html.Br(),
+        html.Div(style={'display': 'flex', 'gap': '15px'}, children=[
             dcc.Dropdown(
-                id="gender-filter",
-                options=[
-                    {"label": "Show All", "value": "all"},
-                    {"label": "More (Top 3)", "value": "more"},
-                    {"label": "Less (Bottom 3)", "value": "less"}
-                ],
-                value="all",
-                style={'width': '25%'}
+                id="compare-dd",
+                multi=True,
+                placeholder=f"Select up to {COMPARE_MAX_QUESTIONS} questions",
+                style={'width': '70%'}
             ),
-            dcc.Graph(id="gender-plot")
-        ]),
-
-        # ==================== AGE ====================
-        dcc.Tab(label="Age", children=[
-            html.Br(),
             dcc.Dropdown(
-                id="age-filter",
-                options=[
-                    {"label": "Show All", "value": "all"},
-                    {"label": "More (Top 3)", "value": "more"},
-                    {"label": "Less (Bottom 3)", "value": "less"}
-                ],
-                value="all",
+                id="compare-panel",
+                options=[{"label": label, "value": p} for p, label in COMPARE_PANELS.items()],
+                value="overall",
+                clearable=False,
                 style={'width': '25%'}
             ),
-            dcc.Graph(id="age-plot")
         ]),
+        html.Div(id="compare-note", style={'marginTop': '10px'}),
+        dcc.Graph(id="compare-plot")
+    ])
+
+
+def serve_layout():
+    # Built per page load: the class list follows refreshed data, and
+    # the dropdowns show a loading state until the data is ready
+    loading = data is None
+    return html.Div(style={'padding': '20px'}, children=[
+
+        html.H1("BRFSS Interactive Dashboard"),
 
-        # ==================== RACE ====================
-        dcc.Tab(label="Race", children=[
-            html.Br(),
+        # -------------------- TOP DROPDOWNS --------------------
+        html.Div(style={'display': 'flex', 'gap': '15px'}, children=[
             dcc.Dropdown(
-                id="race-filter",
-                options=[
-                    {"label": "Show All", "value": "all"},
-                    {"label": "More (Top 3)", "value": "more"},
-                    {"label": "Less (Bottom 3)", "value": "less"}
-                ],
-                value="all",
-                style={'width': '25%'}
+                id="class-dd",
+                options=[] if loading else class_dropdown_options(data),
+                placeholder="Loading data…" if loading else "Select Class",
+                disabled=loading,
+                style={'width': '30%'}
             ),
-            dcc.Graph(id="race-plot")
-        ]),
-
-        # ==================== EDUCATION ====================
-        dcc.Tab(label="Education", children=[
-            html.Br(),
             dcc.Dropdown(
-                id="education-filter",
-                options=[
-                    {"label": "Show All", "value": "all"},
-                    {"label": "More (Top 3)", "value": "more"},
-                    {"label": "Less (Bottom 3)", "value": "less"}
-                ],
-                value="all",
-                style={'width': '25%'}
+                id="topic-dd",
+                placeholder="Loading data…" if loading else "Select Topic",
+                disabled=loading,
+                style={'width': '30%'}
             ),
-            dcc.Graph(id="education-plot")
-        ]),
-
-        # ==================== INCOME ====================
-        dcc.Tab(label="Income", children=[
-            html.Br(),
             dcc.Dropdown(
-                id="income-filter",
-                options=[
-                    {"label": "Show All", "value": "all"},
-                    {"label": "More (Top 3)", "value": "more"},
-                    {"label": "Less (Bottom 3)", "value": "less"}
-                ],
-                value="all",
-                style={'width': '25%'}
+                id="question-dd",
+                placeholder="Loading data…" if loading else "Select Question",
+                disabled=loading,
+                style={'width': '40%'}
             ),
-            dcc.Graph(id="income-plot")
         ]),
+        dcc.Interval(id="data-poll", interval=1000, disabled=not loading),
 
-        # ==================== TEMPORAL ====================
-        dcc.Tab(label="Temporal", children=[
-            html.Br(),
-            dcc.Dropdown(
-                id="temporal-filter",
-                options=[
-                    {"label": "Show All", "value": "all"},
-                    {"label": "More (Top 3)", "value": "more"},
-                    {"label": "Less (Bottom 3)", "value": "less"}
-                ],
-                value="all",
-                style={'width': '25%'}
-            ),
-            dcc.Graph(id="temporal-plot")
+        # Every panel covers the selected years (utils/years.py)
+        html.Div(style={'marginTop': '20px'}, children=[
+            dcc.RangeSlider(id="year-range", step=1, allowCross=False, **year_slider(data))
         ]),
 
-        # ==================== STATE MAP ====================
-        dcc.Tab(label="State / Territory Heatmap", children=[
-            html.Br(),
-            dcc.Dropdown(
-                id="state-filter",
-                options=[
-                    {"label": "Show All", "value": "all"},
-                    {"label": "More (Top 3)", "value": "more"},
-                    {"label": "Less (Bottom 3)", "value": "less"}
-                ],
-                value="all",
-                style={'width': '25%'}
-            ),
-            dcc.Graph(id="state-map")
+        html.Div(
+            id="selected-question-display",
+            style={
+                'marginTop':'20px',
+                'fontSize':'20px',
+                'fontWeight':'bold',
+                'background':'#000',
+                'color':'white',
+                'padding':'10px',
+                'borderRadius':'8px'
+            }
+        ),
+
+        # Progress of a cold panel computed in the background (utils/jobs.py)
+        dcc.Store(id="session-id", data=uuid.uuid4().hex),
+        dcc.Store(id="panel-ready"),
+        dcc.Interval(id="job-poll", interval=JOB_POLL_MS, disabled=True),
+        html.Div(id="job-progress", style={'marginTop': '10px'}),
+
+        html.Hr(),
+
+        # -------------------- TABS --------------------
+        # Tab values match the panel names; only the active tab is computed.
+        dcc.Tabs(id="tabs", value="overall", children=[
+            panel_tab("overall", "Overall", "overall-plot"),
+            panel_tab("gender", "Gender", "gender-plot"),
+            panel_tab("age", "Age", "age-plot"),
+            panel_tab("race", "Race", "race-plot"),
+            panel_tab("education", "Education", "education-plot"),
+            panel_tab("income", "Income", "income-plot"),
+            panel_tab("temporal", "Temporal", "temporal-plot"),
+            panel_tab("state", "State / Territory Heatmap", "state-map"),
+            compare_tab(),
         ])
     ])
-])
+
+
+app.layout = serve_layout
+
+
+@app.server.route("/healthz")
+def healthz():
+    # Liveness: the process serves requests (data may still be loading)
+    return jsonify({"status": "ok", "uptime": round(time.time() - STARTED, 3)})
+
+
+@app.server.route("/readyz")
+def readyz():
+    # Readiness: data loaded, panels can be served
+    body = {"ready": data is not None, "ready_seconds": ready_seconds, "error": load_error}
+    return jsonify(body), 200 if data is not None else 503
+
+
+def _not_ready():
+    return jsonify({"ready": False, "error": load_error}), 503
+
+
+@app.server.route("/cache-stats")
+def cache_stats():
+    d = data
+    if d is None:
+        return _not_ready()
+    return jsonify({
+        "dataset": d.fingerprint,
+        "questions": d.question_cache.stats(),
+        "figures": d.figure_cache.stats(),
+        "years": d.year_cache.stats(),
+        "warmup": warmer.stats(),
+        "jobs": jobs.stats(),
+    })
+
+
+def _cache_metrics():
+    d = data
+    lines = gauge("brfss_data_ready", "1 once the dataset is loaded.", int(d is not None))
+    if ready_seconds is not None:
+        lines += gauge("brfss_ready_seconds", "Seconds from start to data ready.", ready_seconds)
+    for key, value in warmer.stats().items():
+        lines += gauge(f"brfss_warmup_{key}", f"Cache warming {key}.", value)
+    for key, value in jobs.stats().items():
+        lines += gauge(f"brfss_jobs_{key}", f"Background panel jobs {key}.", value)
+    if d is None:
+        return lines
+    for key, value in d.question_cache.stats().items():
+        lines += gauge(f"brfss_question_cache_{key}", f"QuestionCache {key}.", value)
+    for key, value in d.figure_cache.stats().items():
+        lines += gauge(f"brfss_figure_cache_{key}", f"FigureCache {key}.", value)
+    for key, value in d.year_cache.stats().items():
+        lines += gauge(f"brfss_year_cache_{key}", f"YearCache {key}.", value)
+    return lines
+
+
+registry.add_collector(_cache_metrics)
+
+
+@app.server.route("/metrics")
+def metrics():
+    # Prometheus text format; local scrapers only unless configured otherwise
+    if METRICS_LOCAL_ONLY and request.remote_addr not in ("127.0.0.1", "::1"):
+        abort(403)
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.server.route("/export")
+def export():
+    # ?question=&class=&topic= (repeatable; none → all), ?panel= (repeatable), ?format=csv|parquet
+    from utils.export import FORMATS, resolve_questions, resolve_panels, stream_export
+
+    d = data
+    if d is None:
+        return _not_ready()
+    fmt = request.args.get("format", "csv")
+    try:
+        questions = resolve_questions(d.option_tree, request.args.getlist("question"),
+                                      request.args.getlist("class"), request.args.getlist("topic"))
+        panels = resolve_panels(request.args.getlist("panel"))
+        chunks = stream_export(d, questions, panels, fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    mimetype, ext = FORMATS[fmt]
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=brfss-export.{ext}"
+    })
 
 
 # =========================================================
 # DROPDOWN CASCADE CALLBACKS
 # =========================================================
 
+@app.callback(
+    Output("class-dd", "options"),
+    Output("class-dd", "placeholder"),
+    Output("class-dd", "disabled"),
+    Output("topic-dd", "placeholder"),
+    Output("topic-dd", "disabled"),
+    Output("question-dd", "placeholder"),
+    Output("question-dd", "disabled"),
+    Output("data-poll", "disabled"),
+    Output("year-range", "min"),
+    Output("year-range", "max"),
+    Output("year-range", "value"),
+    Output("year-range", "marks"),
+    Output("year-range", "disabled"),
+    Input("data-poll", "n_intervals"),
+    prevent_initial_call=True
+)
+def data_loaded_poll(_):
+    # Leave the loading state once the background load is done
+    if not data_loaded.is_set():
+        raise PreventUpdate
+    slider = year_slider(data)
+    slider = (slider["min"], slider["max"], slider["value"], slider["marks"], slider["disabled"])
+    if data is None:
+        failed = "Data failed to load"
+        return ([], failed, True, failed, True, failed, True, True) + slider
+    return (class_dropdown_options(data), "Select Class", False,
+            "Select Topic", False, "Select Question", False, True) + slider
+
+
 @app.callback(
     Output("topic-dd", "options"),
     Input("class-dd", "value")
 )
+@instrument("update_topics")
 def update_topics(c):
-    topics = get_topic_options(df, c)
+    from utils.options import tree_topic_options
+    topics = tree_topic_options(current().option_tree, c)
     return [{"label": t, "value": t} for t in topics]
 
 
@@ -281,8 +479,13 @@ def update_topics(c):
     Input("class-dd", "value"),
     Input("topic-dd", "value")
 )
+@instrument("update_questions")
 def update_questions(c, t):
-    qs = get_question_options(df, c, t)
+    from utils.options import tree_question_options
+    qs = tree_question_options(current().option_tree, c, t)
+    if t and WARM_TOPICS:
+        # The user will likely pick one of these next: default tab first
+        warm_questions(qs, ["overall"], front=True)
     return [{"label": q, "value": q} for q in qs]
 
 
@@ -293,126 +496,446 @@ def update_questions(c, t):
 def show_q(q):
     if not q:
         return "📌 No question selected"
+    if access_log.record(q):
+        warmer.submit(("flush",), access_log.flush)
     return f"📌 Selected Question: {q}"
 
 
 # =========================================================
-# PANEL CALLBACKS
+# PANEL FIGURES
 # =========================================================
 
-@app.callback(
-    Output("overall-plot", "figure"),
-    Input("question-dd", "value"),
-    Input("overall-filter", "value")
-)
-def update_overall(q, mode):
-    if not q:
-        return go.Figure()
-    summary = apply_filter(aggregate_overall(load_question(df, q)), mode)
-    if summary.empty:
-        return go.Figure(layout={"title":"No aggregation possible"})
+def figure_overall(summary):
     return build_ci_bar(summary, "Response", "Overall Summary")
 
 
-@app.callback(
-    Output("gender-plot", "figure"),
-    Input("question-dd", "value"),
-    Input("gender-filter", "value")
-)
-def update_gender(q, mode):
-    if not q:
-        return go.Figure()
-    summary = apply_filter(aggregate_gender(load_question(df, q)), mode)
-    if summary.empty:
-        return go.Figure(layout={"title":"No gender data"})
+def figure_gender(summary):
+    import plotly.express as px
     return px.bar(summary, y="Break_Out", x="percent", color="Response",
-                  orientation="h", title="By Gender")
+                  orientation="h", custom_data=["row"], title="By Gender")
 
 
-@app.callback(
-    Output("age-plot", "figure"),
-    Input("question-dd", "value"),
-    Input("age-filter", "value")
-)
-def update_age(q, mode):
-    if not q:
-        return go.Figure()
-    summary = apply_filter(aggregate_age(load_question(df, q)), mode)
-    if summary.empty:
-        return go.Figure(layout={"title":"No age data"})
+def figure_age(summary):
     return build_ci_bar(summary, "Break_Out", "By Age Group")
 
 
-@app.callback(
-    Output("race-plot", "figure"),
-    Input("question-dd", "value"),
-    Input("race-filter", "value")
-)
-def update_race(q, mode):
-    if not q:
-        return go.Figure()
-    summary = apply_filter(aggregate_race(load_question(df, q)), mode)
-    if summary.empty:
-        return go.Figure(layout={"title":"No race data"})
+def figure_race(summary):
     return build_ci_bar(summary, "Break_Out", "By Race")
 
 
-@app.callback(
-    Output("education-plot", "figure"),
-    Input("question-dd", "value"),
-    Input("education-filter", "value")
-)
-def update_education(q, mode):
+def figure_education(summary):
+    return build_ci_bar(summary, "Break_Out", "By Education")
+
+
+def figure_income(summary):
+    return build_ci_bar(summary, "Break_Out", "By Income")
+
+
+def figure_temporal(summary):
+    import plotly.express as px
+    summary = summary.sort_values("Year")
+    return px.line(summary, x="Year", y="percent", color="Response", markers=True,
+                   custom_data=["row"], title="Temporal Trend")
+
+
+def figure_state(summary):
+    return build_geo_map(summary)
+
+
+# panel -> (figure builder, title when there is nothing to show)
+PANEL_FIGURES = {
+    "overall":   (figure_overall, "No aggregation possible"),
+    "gender":    (figure_gender, "No gender data"),
+    "age":       (figure_age, "No age data"),
+    "race":      (figure_race, "No race data"),
+    "education": (figure_education, "No education data"),
+    "income":    (figure_income, "No income data"),
+    "temporal":  (figure_temporal, "No temporal data"),
+    "state":     (figure_state, "No state data"),
+}
+
+
+# Decimals kept in what is sent to the browser (hover shows 2); values
+# also go out as float32, which halves Plotly's binary arrays
+PAYLOAD_DECIMALS = 4
+
+
+def trim_precision(summary):
+    floats = summary.select_dtypes("float").columns
+    return summary.astype({c: "float32" for c in floats}).round(PAYLOAD_DECIMALS)
+
+
+def panel_summary(panel, q, mode="all", window=None):
+    # Row ids let the browser map figure points back to summary rows
+    summary = trim_precision(apply_filter(get_panel(q, panel, window), mode))
+    return summary.assign(row=range(len(summary)))
+
+
+def render_panel(panel, q, mode="all", summary=None, window=None):
     if not q:
         return go.Figure()
-    summary = apply_filter(aggregate_education(load_question(df, q)), mode)
+    builder, empty_title = PANEL_FIGURES[panel]
+    if summary is None:
+        summary = panel_summary(panel, q, mode, window)
     if summary.empty:
-        return go.Figure(layout={"title":"No education data"})
-    return build_ci_bar(summary, "Break_Out", "By Education")
+        return go.Figure(layout={"title": empty_title})
+    with stage("figure"):
+        fig = builder(summary)
+    if window is not None:
+        fig.update_layout(title_text=f"{fig.layout.title.text} ({window[0]}–{window[1]})")
+    return fig
+
+
+# =========================================================
+# PANEL CALLBACKS (active tab only)
+#
+# A question change only computes the panel whose tab is open. Hidden
+# panels are blanked and computed on first view (usually a figure
+# cache hit after the background prefetch); after that, switching
+# tabs re-uses the figure already in the browser.
+#
+# The server always sends the full panel ("Show All") plus its summary
+# rows; the Top-3 / Bottom-3 filters run in the browser
+# (assets/panel_filter.js) without a server round trip. When the
+# browser already holds this panel for another question, only a patch
+# against that figure goes out (*-rendered records which one).
+# =========================================================
+
+def panel_json(panel, q, d=None, window=None):
+    """Figure cache entry (JSON text) of one panel, built on a miss."""
+    def build():
+        summary = panel_summary(panel, q, window=window)
+        fig = render_panel(panel, q, summary=summary, window=window)
+        cols = ["row", "percent"] + (["Locationabbr"] if panel == "state" else [])
+        rows = (summary[cols].to_json(orient="records", double_precision=PAYLOAD_DECIMALS)
+                if not summary.empty else "[]")
+        return f'{{"figure": {fig.to_json()}, "rows": {rows}}}'
+
+    return (d or current()).figure_cache.get_or_build(panel_key(q, panel, window), build)
+
+
+def cached_panel(panel, q, d=None, window=None):
+    """{"figure": full figure, "rows": summary rows}, via the figure cache."""
+    return json.loads(panel_json(panel, q, d, window))
+
+
+def figure_patch(old, new):
+    """
+    Patch turning figure old (already in the browser) into new: traces
+    are replaced, layout keys only if they changed — the template and
+    the map's geo settings stay put.
+    """
+    patch = Patch()
+    patch["data"] = new["data"]
+    old_layout, new_layout = old.get("layout", {}), new.get("layout", {})
+    for key, value in new_layout.items():
+        if old_layout.get(key) != value:
+            patch["layout"][key] = value
+    for key in old_layout.keys() - new_layout.keys():
+        del patch["layout"][key]
+    return patch
+
+
+def panel_figure(panel, q, rendered, d, window=None):
+    """(full figure or patch, rows) for q, given what the browser holds."""
+    payload = cached_panel(panel, q, d, window)
+    if rendered and rendered["dataset"] == d.fingerprint:
+        old = d.figure_cache.peek(panel_key(rendered["question"], panel, rendered.get("window")))
+        if old is not None:
+            with stage("figure_patch"):
+                return figure_patch(json.loads(old)["figure"], payload["figure"]), payload["rows"]
+    return payload["figure"], payload["rows"]
+
+
+# Background warm-ups (utils/warmup.py): popular questions at startup,
+# the questions of an opened Topic, hidden tabs (BRFSS_PREFETCH_TABS=1)
+access_log = AccessLog(os.path.join(CACHE_DIR, "access-counts.json"))
+warmer = Warmer()
+
+
+def warm_questions(questions, panels, front=False):
+    """Queue the figure cache entries of these panels of these questions."""
+    warmer.submit_many(
+        (((q, panel), lambda q=q, panel=panel: panel_json(panel, q))
+         for q in questions for panel in panels),
+        front=front
+    )
+
+
+def prefetch(q, active):
+    """Fill the figure cache for the hidden tabs (BRFSS_PREFETCH_TABS=1)."""
+    if not PREFETCH_TABS or not q:
+        return
+    warm_questions([q], [p for p in PANEL_FIGURES if p != active], front=True)
+
+
+# =========================================================
+# BACKGROUND PANEL JOBS
+#
+# Panels that are cached, or that get_panel answers without aggregating
+# rows (no data, cube, year cache, prepared question), are rendered in
+# the callback as before. Only a panel that needs a pass over its rows
+# goes on the job queue (utils/jobs.py) for this page's session-id,
+# which cancels the page's previous job if nobody else waits on it; the
+# figure stays as it is, job-poll ticks until the job is done and
+# panel-ready tells the panel callback to pick the figure up.
+#
+# The panel callback and dispatch_panel both call cold_job: whichever
+# runs first queues the job and the other joins it (jobs are keyed).
+# =========================================================
+jobs = JobQueue()
+
+# Job state / pipeline stage -> progress label, in pipeline order
+JOB_STEPS = {
+    "queued": "Queued",
+    "running": "Computing",
+    "year_sums": "Summing per year",
+    "load_question": "Loading rows",
+    "compute_all_panels": "Aggregating",
+    "year_window": "Selecting the years",
+    "figure": "Drawing the figure",
+}
+
+
+def cheap_panel(d, q, panel, window):
+    """True when get_panel answers without a pass over the question's rows."""
+    from utils.options import has_panel_data
+
+    if not has_panel_data(d.option_tree, q, panel):
+        return True
+    if window is not None:
+        return q in d.year_cache
+    return d.cube is not None or d.backend.cached(q)
+
+
+def cold_job(d, session, q, panel, window):
+    """The background job computing this panel, or None if it is cached or cheap."""
+    key = panel_key(q, panel, window)
+    if d.figure_cache.peek(key) is not None or cheap_panel(d, q, panel, window):
+        return None
+
+    def run():
+        # Labelled like the warm-ups: not a callback, so it neither counts
+        # as in flight nor holds back the cache warm-ups
+        with background(f"job_{panel}"):
+            return panel_json(panel, q, d, window)
+
+    return jobs.submit(session, (d.fingerprint,) + key, run)
+
+
+def job_progress(job):
+    step = job.stage if job.stage in JOB_STEPS else job.state
+    return html.Div([
+        html.Progress(value=list(JOB_STEPS).index(step) + 1, max=len(JOB_STEPS)),
+        f" {JOB_STEPS[step]}… {job.elapsed():.1f}s"
+    ])
 
 
 @app.callback(
-    Output("income-plot", "figure"),
+    Output("job-poll", "disabled"),
+    Output("job-progress", "children"),
+    Output("panel-ready", "data"),
     Input("question-dd", "value"),
-    Input("income-filter", "value")
+    Input("tabs", "value"),
+    Input("year-range", "value"),
+    Input("job-poll", "n_intervals"),
+    State("session-id", "data")
 )
-def update_income(q, mode):
-    if not q:
-        return go.Figure()
-    summary = apply_filter(aggregate_income(load_question(df, q)), mode)
-    if summary.empty:
-        return go.Figure(layout={"title":"No income data"})
-    return build_ci_bar(summary, "Break_Out", "By Income")
+def dispatch_panel(q, tab, years, _, session):
+    # Not instrumented: polling must not hold back the cache warm-ups
+    if not q or tab not in PANEL_FIGURES:
+        jobs.release(session)
+        return True, None, no_update
+    d = current()
+    window = year_window(years, d)
+    key = (d.fingerprint,) + panel_key(q, tab, window)
+
+    job = jobs.session_job(session)
+    if job is None or job.key != key or job.state == "cancelled":
+        # The panel callback may have queued it already (then this joins it)
+        job = cold_job(d, session, q, tab, window)
+    if job is None:
+        # Cached or cheap: the panel callback renders it right away
+        jobs.release(session)
+        return True, None, no_update
+    if job.state == "failed":
+        jobs.release(session)
+        return True, f"⚠️ Computing this panel failed: {job.error}", no_update
+    if job.state == "done":
+        jobs.release(session)
+        return True, None, {"question": q, "panel": tab, "window": window,
+                            "dataset": d.fingerprint}
+    return False, job_progress(job), no_update
+
+
+def register_panel(panel, graph_id):
+    @app.callback(
+        Output(f"{panel}-full", "data"),
+        Output(f"{panel}-rows", "data"),
+        Output(f"{panel}-rendered", "data"),
+        Input("question-dd", "value"),
+        Input("tabs", "value"),
+        Input("year-range", "value"),
+        Input("panel-ready", "data"),
+        State(f"{panel}-rendered", "data"),
+        State("session-id", "data")
+    )
+    @instrument(f"update_{panel}")
+    def update(q, tab, years, ready, rendered, session):
+        window = year_window(years)
+        ready = ready if ctx.triggered_id == "panel-ready" else None
+        if ready is not None and (ready["panel"], ready["question"], ready["window"]) != (
+                panel, q, window):
+            raise PreventUpdate
+        if rendered is not None and (rendered["question"], rendered.get("window")) == (q, window):
+            raise PreventUpdate
+        if rendered is None and not q:
+            raise PreventUpdate
+        if tab != panel:
+            # Stale figure on a hidden tab: blank it, compute on first view
+            if rendered is None:
+                raise PreventUpdate
+            return go.Figure(), [], None
+        if not q:
+            return go.Figure(), [], None
+        d = current()
+        if ready is None and cold_job(d, session, q, panel, window) is not None:
+            # Needs a pass over the rows: computed in the background
+            raise PreventUpdate
+        figure, rows = panel_figure(panel, q, rendered, d, window)
+        if window is None:
+            prefetch(q, panel)
+        return figure, rows, {"question": q, "window": window, "dataset": d.fingerprint}
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="brfss", function_name="filter_panel"),
+        Output(graph_id, "figure"),
+        Input(f"{panel}-full", "data"),
+        Input(f"{panel}-rows", "data"),
+        Input(f"{panel}-filter", "value")
+    )
+
+    update.__name__ = f"update_{panel}"
+    return update
+
+
+update_overall = register_panel("overall", "overall-plot")
+update_gender = register_panel("gender", "gender-plot")
+update_age = register_panel("age", "age-plot")
+update_race = register_panel("race", "race-plot")
+update_education = register_panel("education", "education-plot")
+update_income = register_panel("income", "income-plot")
+update_temporal = register_panel("temporal", "temporal-plot")
+update_state = register_panel("state", "state-map")
+
+
+# =========================================================
+# COMPARE TAB
+#
+# One panel for up to BRFSS_COMPARE_MAX_QUESTIONS questions, one facet
+# per question. All of them are aggregated together
+# (utils/compare.py); the figure is cached under the tuple of questions.
+# =========================================================
+
+def short_title(text, width=60):
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def figure_compare(summary, panel, questions, window=None):
+    import plotly.express as px
+    from utils.aggregation import PANELS
+
+    _, group_cols = PANELS[panel]
+    x = group_cols[0] if group_cols else "Response"
+    summary = summary.assign(Question=summary["Question"].astype(str))
+    questions = [q for q in questions if q in set(summary["Question"])]
+    cols = min(len(questions), 3)
+    common = dict(
+        facet_col="Question", facet_col_wrap=cols,
+        category_orders={"Question": list(questions)},
+        height=420 * -(-len(questions) // cols),
+        title=f"{COMPARE_PANELS[panel]} — {len(questions)} questions"
+              + (f" ({window[0]}–{window[1]})" if window else "")
+    )
+
+    if panel == "temporal":
+        fig = px.line(summary.sort_values("Year"), x="Year", y="percent",
+                      color="Response", markers=True, **common)
+    else:
+        summary = summary.assign(
+            ci_plus=summary["ci_high"] - summary["percent"],
+            ci_minus=summary["percent"] - summary["ci_low"]
+        )
+        fig = px.bar(summary, x=x, y="percent", color="Response", barmode="group",
+                     error_y="ci_plus", error_y_minus="ci_minus",
+                     hover_data={"percent": ":.2f", "ci_low": ":.2f", "ci_high": ":.2f"},
+                     **common)
+    fig.for_each_annotation(lambda a: a.update(text=short_title(a.text.split("=", 1)[-1])))
+    fig.update_yaxes(title_text="")
+    fig.update_yaxes(title_text="Percent (%)", col=1)
+    return fig
+
+
+def compare_json(questions, panel, d, window=None):
+    """Figure cache entry (JSON text) of one panel for several questions."""
+    from utils.compare import compare_panel
+
+    def build():
+        summary = trim_precision(compare_panel(d, questions, panel, window))
+        if summary.empty:
+            return go.Figure(layout={"title": PANEL_FIGURES[panel][1]}).to_json()
+        with stage("figure"):
+            return figure_compare(summary, panel, questions, window).to_json()
+
+    parts = (tuple(questions), "compare", panel) + tuple(window or ())
+    return d.figure_cache.get_or_build(parts, build)
 
 
 @app.callback(
-    Output("temporal-plot", "figure"),
-    Input("question-dd", "value"),
-    Input("temporal-filter", "value")
+    Output("compare-dd", "options"),
+    Input("tabs", "value"),
+    Input("data-poll", "disabled")
 )
-def update_temporal(q, mode):
-    if not q:
-        return go.Figure()
-    summary = apply_filter(aggregate_temporal(load_question(df, q)), mode)
-    if summary.empty:
-        return go.Figure(layout={"title":"No temporal data"})
-    summary = summary.sort_values("Year")
-    return px.line(summary, x="Year", y="percent", color="Response", markers=True,
-                   title="Temporal Trend")
+@instrument("update_compare_options")
+def update_compare_options(tab, _):
+    from utils.compare import compare_options
+    if tab != "compare":
+        raise PreventUpdate
+    return [{"label": q, "value": q} for q in compare_options(current().option_tree)]
 
 
 @app.callback(
-    Output("state-map", "figure"),
-    Input("question-dd", "value"),
-    Input("state-filter", "value")
+    Output("compare-plot", "figure"),
+    Output("compare-note", "children"),
+    Input("compare-dd", "value"),
+    Input("compare-panel", "value"),
+    Input("tabs", "value"),
+    Input("year-range", "value")
 )
-def update_state(q, mode):
-    if not q:
-        return go.Figure()
-    summary = apply_filter(aggregate_state(load_question(df, q)), mode)
-    if summary.empty:
-        return go.Figure(layout={"title":"No state data"})
-    return build_geo_map(summary)
+@instrument("update_compare")
+def update_compare(questions, panel, tab, years):
+    from utils.options import has_panel_data
+
+    if tab != "compare":
+        raise PreventUpdate
+    questions = list(questions or [])
+    if not questions:
+        return go.Figure(), ""
+    d = current()
+
+    notes = []
+    if len(questions) > COMPARE_MAX_QUESTIONS:
+        notes.append(f"Showing the first {COMPARE_MAX_QUESTIONS} of {len(questions)} questions.")
+        questions = questions[:COMPARE_MAX_QUESTIONS]
+    missing = [q for q in questions if not has_panel_data(d.option_tree, q, panel)]
+    if missing:
+        notes.append(f"No {COMPARE_PANELS[panel].lower()} data for: " + "; ".join(missing))
+    window = year_window(years, d)
+    return json.loads(compare_json(questions, panel, d, window)), " ".join(notes)
+
+
+# Everything above is defined: start loading (the server binds meanwhile)
+threading.Thread(target=load_data, name="brfss-load", daemon=True).start()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+/*
+ * Top-3 / Bottom-3 panel filtering in the browser.
+ *
+ * The server sends each panel's full figure once (every point carries
+ * its summary row id in customdata[0]) plus the summary rows
+ * ({row, percent[, Locationabbr]}). Switching a *-filter dropdown only
+ * re-runs this function — same selection rule as apply_filter() in
+ * app.py — and never goes back to the server.
+ */
+(function () {
+    var TYPED = {
+        i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array,
+        i4: Int32Array, u4: Uint32Array, f4: Float32Array, f8: Float64Array
+    };
+
+    // Plotly serializes numpy arrays as {dtype, bdata[, shape]}
+    function unpack(value) {
+        if (!value || typeof value !== "object" || !value.bdata) {
+            return value;
+        }
+        var raw = atob(value.bdata);
+        var bytes = new Uint8Array(raw.length);
+        for (var i = 0; i < raw.length; i++) {
+            bytes[i] = raw.charCodeAt(i);
+        }
+        var flat = Array.prototype.slice.call(new TYPED[value.dtype](bytes.buffer));
+        if (!value.shape) {
+            return flat;
+        }
+        var cols = parseInt(String(value.shape).split(",")[1], 10);
+        var out = [];
+        for (var r = 0; r < flat.length / cols; r++) {
+            out.push(flat.slice(r * cols, (r + 1) * cols));
+        }
+        return out;
+    }
+
+    // Same as apply_filter(): sort by percent, keep 3
+    function selectRows(rows, mode) {
+        var sorted = rows.slice().sort(function (a, b) {
+            return mode === "more" ? b.percent - a.percent : a.percent - b.percent;
+        });
+        return sorted.slice(0, 3);
+    }
+
+    function pick(values, idx) {
+        values = unpack(values);
+        return idx.map(function (i) { return values[i]; });
+    }
+
+    function filterTrace(trace, keep) {
+        var ids = unpack(trace.customdata) || [];
+        var idx = [];
+        ids.forEach(function (c, i) {
+            if (keep[c[0]]) { idx.push(i); }
+        });
+        if (!idx.length) {
+            return null;
+        }
+        var n = ids.length;
+        var out = Object.assign({}, trace);
+        ["x", "y", "customdata", "text", "hovertext"].forEach(function (k) {
+            var v = unpack(trace[k]);
+            if (Array.isArray(v) && v.length === n) { out[k] = pick(v, idx); }
+        });
+        ["error_x", "error_y"].forEach(function (k) {
+            if (!trace[k]) { return; }
+            out[k] = Object.assign({}, trace[k]);
+            ["array", "arrayminus"].forEach(function (a) {
+                var v = unpack(trace[k][a]);
+                if (Array.isArray(v) && v.length === n) { out[k][a] = pick(v, idx); }
+            });
+        });
+        return out;
+    }
+
+    // build_geo_map(): highest remaining response per state
+    function filterMap(trace, kept) {
+        var best = {};
+        kept.forEach(function (r) {
+            var s = r.Locationabbr;
+            if (s && s.length === 2 && (!best[s] || r.percent > best[s].percent)) {
+                best[s] = r;
+            }
+        });
+        var states = Object.keys(best);
+        return Object.assign({}, trace, {
+            locations: states,
+            hovertext: states,
+            z: states.map(function (s) { return best[s].percent; }),
+            customdata: states.map(function (s) { return [best[s].row]; })
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        brfss: {
+            filter_panel: function (fig, rows, mode) {
+                if (!fig) {
+                    return {};
+                }
+                if (!rows || !rows.length || mode === "all" || !mode) {
+                    return fig;
+                }
+                var kept = selectRows(rows, mode);
+                var keep = {};
+                kept.forEach(function (r) { keep[r.row] = true; });
+
+                var data = (fig.data || []).map(function (trace) {
+                    return trace.type === "choropleth" ? filterMap(trace, kept)
+                                                       : filterTrace(trace, keep);
+                }).filter(function (t) { return t !== null; });
+
+                return Object.assign({}, fig, {data: data});
+            }
+        }
+    });
+})();
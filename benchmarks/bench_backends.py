@@ -0,0 +1,60 @@
+# benchmarks/bench_backends.py — live panel latency per query backend
+#
+#   python -m benchmarks.bench_backends [path/to/brfss.csv] [questions]
+#
+# Cold latency (nothing cached) of one panel, and of all panels of a
+# question, for each backend. The pandas backend needs the frame in
+# memory; the DuckDB backend reads the question's rows from disk.
+import statistics
+import sys
+import time
+
+from utils.aggregation import PANELS
+from utils.backends import DuckDBBackend, PandasBackend, duckdb_source
+from utils.cache import QuestionCache
+from utils.config import DATA_CSV
+from utils.ingest import load_dataset
+from utils.prepare import build_question_index
+
+
+def _ms(fn, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main(csv_path=DATA_CSV, n_questions=10, runs=3):
+    df = load_dataset(csv_path)
+    index = build_question_index(df)
+    cache = QuestionCache(df, index)
+    backends = [PandasBackend(cache), DuckDBBackend(duckdb_source(csv_path))]
+
+    # Largest questions first: the ones users wait on
+    questions = sorted(index, key=lambda q: -len(cache.df.iloc[index[q]]))[:n_questions]
+    print(f"rows={len(df):,} questions={len(questions)} (largest) runs={runs}")
+
+    print(f"{'backend':>8} " + " ".join(f"{p:>9}" for p in PANELS) + f" {'all':>9}  (median ms)")
+    for backend in backends:
+        def cold(fn):
+            def run():
+                cache.clear()
+                fn()
+            return run
+
+        row = []
+        for panel in PANELS:
+            row.append(statistics.mean(
+                _ms(cold(lambda: backend.panel(q, panel)), runs) for q in questions))
+        row.append(statistics.mean(
+            _ms(cold(lambda: backend.panels(q)), runs) for q in questions))
+        print(f"{backend.name:>8} " + " ".join(f"{ms:>9.1f}" for ms in row))
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else DATA_CSV,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    )
@@ -0,0 +1,43 @@
+# benchmarks/bench_cube_build.py — wall-clock speedup of the cube build, 1..N cores
+#
+#   python -m benchmarks.bench_cube_build [path/to/brfss.csv] [max_workers]
+import os
+import sys
+import time
+
+import pandas as pd
+
+from utils.config import DATA_CSV
+from utils.cube import build_cube
+from utils.ingest import load_dataset
+from utils.prepare import build_question_index
+
+
+def main(csv_path=DATA_CSV, max_workers=os.cpu_count() or 1):
+    df = load_dataset(csv_path)
+    index = build_question_index(df)
+    print(f"rows={len(df):,} questions={len(index):,} cores={os.cpu_count()}")
+
+    counts = sorted({1, max_workers} | {n for n in (2, 4, 8, 16, 32) if n < max_workers})
+    reference = None
+    base = None
+    print(f"{'workers':>7} {'wall':>9} {'speedup':>8} {'efficiency':>10}")
+    for n in counts:
+        t0 = time.perf_counter()
+        cube = build_cube(df, index, workers=n)
+        wall = time.perf_counter() - t0
+
+        if reference is None:
+            reference, base = cube, wall
+        else:
+            pd.testing.assert_frame_equal(cube, reference)
+
+        speedup = base / wall
+        print(f"{n:>7} {wall:>8.2f}s {speedup:>7.2f}x {speedup / n:>9.0%}")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else DATA_CSV,
+        int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    )
@@ -0,0 +1,59 @@
+# benchmarks/bench_load_question.py — per-question load latency, scan vs index
+#
+#   python -m benchmarks.bench_load_question [path/to/brfss.csv] [n_questions]
+#
+# Runs against the full 2011–present export (BRFSS_CSV by default).
+import sys
+import time
+
+import numpy as np
+
+from utils.config import DATA_CSV
+from utils.ingest import load_dataset
+from utils.prepare import load_question, select_question, build_question_index
+
+
+def _time(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(csv_path=DATA_CSV, n_questions=25):
+    df = load_dataset(csv_path)
+
+    t0 = time.perf_counter()
+    index = build_question_index(df)
+    build_s = time.perf_counter() - t0
+
+    # Spread the sample over small and large questions
+    sizes = df["Question"].value_counts()
+    picks = sizes.index[np.linspace(0, len(sizes) - 1, min(n_questions, len(sizes))).astype(int)]
+
+    print(f"rows={len(df):,} questions={len(index):,} index build={build_s * 1000:.1f} ms")
+    print(f"{'rows':>8} {'select scan':>12} {'select idx':>11} {'load scan':>10} {'load idx':>9}  question")
+
+    totals = np.zeros(4)
+    for q in picks:
+        t = np.array([
+            _time(lambda: select_question(df, q)),
+            _time(lambda: select_question(df, q, index)),
+            _time(lambda: load_question(df, q)),
+            _time(lambda: load_question(df, q, index)),
+        ]) * 1000
+        totals += t
+        print(f"{sizes[q]:>8,} {t[0]:>10.2f}ms {t[1]:>9.2f}ms {t[2]:>8.2f}ms {t[3]:>7.2f}ms  {q[:60]}")
+
+    mean = totals / len(picks)
+    print(f"{'mean':>8} {mean[0]:>10.2f}ms {mean[1]:>9.2f}ms {mean[2]:>8.2f}ms {mean[3]:>7.2f}ms")
+    print(f"select speedup x{mean[0] / mean[1]:.1f}, load_question speedup x{mean[2] / mean[3]:.1f}")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else DATA_CSV,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    )
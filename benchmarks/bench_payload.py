@@ -0,0 +1,101 @@
+# benchmarks/bench_payload.py — panel payload size and render time
+#
+#   python -m benchmarks.bench_payload [path/to/brfss.csv] [questions]
+#
+# Replays a user stepping through questions on each tab and reports, per
+# panel, the mean bytes sent to the browser — every figure through the
+# serializer Dash uses (plotly.io.json.to_json_plotly):
+#
+#   full64 — full figure without trim_precision (float64 values)
+#   full   — full figure with trim_precision, same questions
+#   patch  — patch against the previous question's figure, for every
+#            question after the first; fullp is the full figure of
+#            those same views, so patch / fullp is the patch saving
+#
+# and the figure build time; for the state map also the old
+# sort + groupby.head(1) best-response pick against best_per_state.
+import os
+import statistics
+import sys
+import time
+
+from plotly.io.json import to_json_plotly
+
+
+def _ms(fn, runs=5):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def best_sorted(summary):
+    best = summary.sort_values("percent", ascending=False).groupby("Locationabbr", observed=True).head(1)
+    return best[best["Locationabbr"].str.len() == 2]
+
+
+def main(csv_path=None, n_questions=20):
+    # app.py and utils.config read these at import time
+    if csv_path:
+        os.environ["BRFSS_CSV"] = csv_path
+    os.environ.setdefault("BRFSS_WARM_TOP_N", "0")
+    os.environ.setdefault("BRFSS_REFRESH_POLL_S", "0")
+    import app
+
+    d = app.wait_ready()
+    if d is None:
+        sys.exit(f"data failed to load: {app.load_error}")
+    questions = list(d.option_tree["panels"])[:n_questions]
+
+    def size(obj):
+        if isinstance(obj, app.Patch):
+            obj = obj.to_plotly_json()
+        return len(to_json_plotly(obj))
+
+    print(f"{'panel':>10} {'full64':>9} {'full':>9} {'fullp':>9} {'patch':>9} "
+          f"{'build64':>9} {'build':>9}")
+    totals = {"full64": 0, "full": 0, "fullp": 0, "patch": 0}
+    for panel, (builder, _) in app.PANEL_FIGURES.items():
+        full64, full, fullp, patch, build64, build = [], [], [], [], [], []
+        rendered = None
+        for q in questions:
+            raw = app.apply_filter(app.get_panel(q, panel), "all")
+            if raw.empty:
+                continue
+            raw = raw.assign(row=range(len(raw)))
+            full64.append(size(builder(raw)))
+            build64.append(_ms(lambda: builder(raw)))
+
+            summary = app.panel_summary(panel, q)
+            full.append(size(builder(summary)))
+            build.append(_ms(lambda: app.render_panel(panel, q, summary=summary)))
+            if rendered:
+                figure, _ = app.panel_figure(panel, q, rendered, d)
+                patch.append(size(figure))
+                fullp.append(full[-1])
+            rendered = {"question": q, "dataset": d.fingerprint}
+
+        mean = lambda xs: statistics.mean(xs) if xs else 0
+        print(f"{panel:>10} {mean(full64):>8.0f}B {mean(full):>8.0f}B {mean(fullp):>8.0f}B "
+              f"{mean(patch):>8.0f}B {mean(build64):>7.2f}ms {mean(build):>7.2f}ms")
+        for name, xs in [("full64", full64), ("full", full), ("fullp", fullp), ("patch", patch)]:
+            totals[name] += sum(xs)
+
+    ratio = lambda a, b: f"{totals[a] / max(totals[b], 1):.0%}"
+    print(f"trim_precision: {ratio('full', 'full64')} of the float64 bytes (full figures)")
+    print(f"patches: {ratio('patch', 'fullp')} of the full-figure bytes (views after the first)")
+
+    states = [app.panel_summary("state", q) for q in questions]
+    states = [s for s in states if not s.empty]
+    if states:
+        print(f"state best-per-state pick: sort+head {statistics.mean(_ms(lambda: best_sorted(s)) for s in states):.2f}ms, "
+              f"argmax {statistics.mean(_ms(lambda: app.best_per_state(s)) for s in states):.2f}ms")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else None,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    )
@@ -0,0 +1,84 @@
+# benchmarks/bench_startup.py — time to first byte vs time to ready
+#
+#   python -m benchmarks.bench_startup [path/to/brfss.csv] [runs]
+#
+# Starts the app server in a fresh process and polls it: time to first
+# byte is the first answer from /healthz (the server is up, data still
+# loading in the background), time to ready the first 200 from /readyz
+# (panels can be served). Caches under BRFSS_CACHE_DIR are built by a
+# warm-up run first, so the numbers are for a restart on cached data.
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from utils.config import DATA_CSV, CACHE_DIR
+
+SERVER = "import sys, app; app.app.run(port=int(sys.argv[1]), debug=False)"
+TIMEOUT_S = 600
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as r:
+            return r.status, json.load(r)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+    except OSError:
+        return None, None
+
+
+def start_once(csv_path, cache_dir):
+    """(seconds to first /healthz answer, seconds to /readyz 200)."""
+    port = _free_port()
+    env = dict(os.environ, BRFSS_CSV=csv_path, BRFSS_CACHE_DIR=cache_dir,
+               BRFSS_REFRESH_POLL_S="0")
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", SERVER, str(port)], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    ttfb = None
+    try:
+        while time.perf_counter() - t0 < TIMEOUT_S:
+            if proc.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            if ttfb is None:
+                if _status(base + "/healthz")[0] == 200:
+                    ttfb = time.perf_counter() - t0
+            else:
+                status, body = _status(base + "/readyz")
+                if status == 200:
+                    return ttfb, time.perf_counter() - t0
+                if body and body.get("error"):
+                    raise RuntimeError(f"data failed to load: {body['error']}")
+            time.sleep(0.02)
+        raise RuntimeError(f"not ready after {TIMEOUT_S}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(csv_path=DATA_CSV, runs=3, cache_dir=CACHE_DIR):
+    start_once(csv_path, cache_dir)    # build caches
+    results = [start_once(csv_path, cache_dir) for _ in range(runs)]
+    ttfb = min(r[0] for r in results)
+    ready = min(r[1] for r in results)
+    print(f"time to first byte: {ttfb * 1000:8.0f} ms")
+    print(f"time to ready:      {ready * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else DATA_CSV,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    )
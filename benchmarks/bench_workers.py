@@ -0,0 +1,96 @@
+# benchmarks/bench_workers.py — memory of 1..8 serving workers, per ingest mode
+#
+#   python -m benchmarks.bench_workers [path/to/brfss.csv] [max_workers]
+#
+# Starts N worker processes that each load the served data the way an
+# app.py worker does (LiveData.load) and answer a few questions, then
+# sums their proportional set size (PSS: shared pages are split between
+# the processes mapping them, so the total is what the host really
+# uses). "idle" workers only import the modules: their slope is the
+# interpreter cost every worker pays regardless of the data.
+#
+# With BRFSS_INGEST_MODE=shared the data is mapped once, so each extra
+# worker should cost little more than an idle one.
+# Exits non-zero if it doesn't (Linux only: reads /proc/<pid>/smaps_rollup).
+import os
+import subprocess
+import sys
+
+from utils.config import DATA_CSV, CACHE_DIR
+
+WORKER = """
+import os, sys
+from utils.refresh import LiveData
+if os.environ["BRFSS_INGEST_MODE"] == "idle":
+    print("ready", flush=True)
+    sys.stdin.read()
+    sys.exit()
+data = LiveData.load(sys.argv[1], sys.argv[2])
+for q in list(data.option_tree["panels"])[:5]:
+    for panel in data.option_tree["panels"][q]:
+        if data.cube is not None:
+            data.cube.get(q, panel)
+        else:
+            data.question_cache.panels(q)
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+# Data memory of an extra shared-mode worker (above an idle one) may be
+# at most this share of an extra memory-mode worker's
+MAX_SHARED_RATIO = 0.25
+
+
+def pss_mb(pid):
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(mode, n, csv_path, cache_dir):
+    env = dict(os.environ, BRFSS_INGEST_MODE=mode, BRFSS_REFRESH_POLL_S="0")
+    procs = [
+        subprocess.Popen([sys.executable, "-c", WORKER, csv_path, cache_dir], env=env,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         text=True)
+        for _ in range(n)
+    ]
+    try:
+        for p in procs:
+            if p.stdout.readline().strip() != "ready":
+                raise RuntimeError(f"{mode} worker failed to start")
+        return sum(pss_mb(p.pid) for p in procs)
+    finally:
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+
+
+def main(csv_path=DATA_CSV, max_workers=8, cache_dir=CACHE_DIR):
+    # Build every cache once, outside the measured processes
+    for mode in ("memory", "shared"):
+        measure(mode, 1, csv_path, cache_dir)
+
+    counts = sorted({1, max_workers} | {n for n in (2, 4) if n < max_workers})
+    slope = {}
+    print(f"{'mode':>7} " + " ".join(f"{n:>8}w" for n in counts) + f" {'per +1w':>9}")
+    for mode in ("idle", "memory", "shared"):
+        totals = [measure(mode, n, csv_path, cache_dir) for n in counts]
+        slope[mode] = (totals[-1] - totals[0]) / max(counts[-1] - counts[0], 1)
+        print(f"{mode:>7} " + " ".join(f"{t:>7.0f}MB" for t in totals) + f" {slope[mode]:>7.1f}MB")
+
+    data = {mode: slope[mode] - slope["idle"] for mode in ("memory", "shared")}
+    ratio = data["shared"] / data["memory"]
+    print(f"data per extra worker: memory {data['memory']:.1f}MB, "
+          f"shared {data['shared']:.1f}MB ({ratio:.0%})")
+    return ratio <= MAX_SHARED_RATIO
+
+
+if __name__ == "__main__":
+    ok = main(
+        sys.argv[1] if len(sys.argv) > 1 else DATA_CSV,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    )
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,71 @@
+# benchmarks/check_backends.py — parity check across query backends
+#
+#   python -m benchmarks.check_backends [path/to/brfss.csv]
+#
+# Every panel of every question from the DuckDB backend (SQL over the
+# ingest cache) must match the pandas backend (load_question +
+# compute_all_panels) — same groups, same order, metrics equal up to
+# float summation order. The batched pass behind the Compare tab and the
+# export (batch_partials, one groupby keyed by Question) must give every
+# question the same panels as computing it on its own.
+import sys
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregation import PANELS, finalize_panel
+from utils.backends import DuckDBBackend, PandasBackend, duckdb_source
+from utils.cache import QuestionCache
+from utils.config import COMPARE_MAX_QUESTIONS, DATA_CSV
+from utils.ingest import load_dataset
+from utils.prepare import build_question_index
+
+
+def _compare(a, b, label):
+    if a.empty and b.empty:
+        return
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        raise AssertionError(f"{label}: shape {a.shape} vs {b.shape}")
+    for c in a.columns:
+        x, y = a[c].to_numpy(), b[c].to_numpy()
+        if a[c].dtype.kind == "f":
+            np.testing.assert_allclose(x, y.astype(float), rtol=1e-9, err_msg=f"{label}: {c}")
+        elif not (pd.Series(x).astype(str).values == pd.Series(y).astype(str).values).all():
+            raise AssertionError(f"{label}: {c} differs")
+
+
+def main(csv_path=DATA_CSV):
+    df = load_dataset(csv_path)
+    index = build_question_index(df)
+    backends = [PandasBackend(QuestionCache(df, index)), DuckDBBackend(duckdb_source(csv_path))]
+
+    reference, *others = backends
+    for q in index:
+        expected = reference.panels(q)
+        for other in others:
+            panels = other.panels(q)
+            for panel in PANELS:
+                _compare(expected[panel], panels[panel], f"{other.name} {q!r} {panel}")
+                _compare(expected[panel], other.panel(q, panel),
+                         f"{other.name} {q!r} {panel} (single panel)")
+
+    questions = list(index)
+    for start in range(0, len(questions), COMPARE_MAX_QUESTIONS):
+        batch = questions[start:start + COMPARE_MAX_QUESTIONS]
+        for backend in backends:
+            partials = backend.batch_partials(batch)
+            for panel, (cat_id, group_cols) in PANELS.items():
+                summary = finalize_panel(partials, cat_id, ["Question"] + group_cols)
+                for q in batch:
+                    got = (summary[summary["Question"] == q].drop(columns="Question")
+                           .reset_index(drop=True) if not summary.empty else summary)
+                    _compare(reference.panel(q, panel), got,
+                             f"{backend.name} batched {q!r} {panel}")
+
+    names = ", ".join(b.name for b in others)
+    print(f"{names} match {reference.name}, batched matches per question: OK "
+          f"({len(index):,} questions × {len(PANELS)} panels)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else DATA_CSV)
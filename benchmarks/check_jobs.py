@@ -0,0 +1,79 @@
+# benchmarks/check_jobs.py — cold / warm / cancel flow of the panel job queue
+#
+#   python -m benchmarks.check_jobs [path/to/brfss.csv]
+#
+# Drives app.dispatch_panel (what the page's poll calls) in live mode
+# with one job worker:
+#   * cold: the panel goes to a job, and the poll reports it ready once
+#     its figure is in the figure cache
+#   * warm: a cached panel needs no job
+#   * two sessions asking for the same panel share one job
+#   * a session moving on cancels its job, whether it has not started
+#     or is already running (it stops at its next stage)
+# and no job counts as an interactive callback (utils.metrics.in_flight).
+import os
+import sys
+import time
+
+
+def main(csv_path=None):
+    # app.py and utils.config read these at import time
+    if csv_path:
+        os.environ["BRFSS_CSV"] = csv_path
+    os.environ.update(BRFSS_PANEL_MODE="live", BRFSS_JOB_WORKERS="1",
+                      BRFSS_WARM_TOP_N="0", BRFSS_REFRESH_POLL_S="0")
+    import app
+    from utils.metrics import in_flight
+
+    d = app.wait_ready()
+    if d is None:
+        sys.exit(f"data failed to load: {app.load_error}")
+    questions = list(d.option_tree["panels"])
+
+    def poll(q, tab, session):
+        while True:
+            done, _, ready = app.dispatch_panel(q, tab, None, 0, session)
+            if done:
+                return ready
+            assert in_flight() == 0, "a job counts as an interactive callback"
+            time.sleep(0.02)
+
+    # Cold, then warm
+    q = questions[0]
+    d.question_cache.clear()
+    assert app.dispatch_panel(q, "age", None, 0, "a")[0] is False, "cold panel: no job"
+    ready = poll(q, "age", "a")
+    assert ready["question"] == q and ready["panel"] == "age", ready
+    assert d.figure_cache.peek(app.panel_key(q, "age")) is not None
+    assert app.cold_job(d, "a", q, "age", None) is None, "warm panel: job queued"
+
+    # Two sessions, one job
+    q = questions[1]
+    d.question_cache.clear()
+    app.dispatch_panel(q, "income", None, 0, "b")
+    app.dispatch_panel(q, "income", None, 0, "c")
+    assert app.jobs.session_job("b") is app.jobs.session_job("c"), "identical jobs not shared"
+    poll(q, "income", "b")
+    poll(q, "income", "c")
+
+    # Moving on cancels, queued or running
+    for tab in ("race", "temporal"):
+        old, new = questions[2:4] if tab == "race" else questions[4:6]
+        d.question_cache.clear()
+        app.dispatch_panel(old, tab, None, 0, "d")
+        job = app.jobs.session_job("d")
+        if tab == "temporal":
+            while job.state == "queued":
+                time.sleep(0.001)
+        app.dispatch_panel(new, tab, None, 0, "d")
+        poll(new, tab, "d")
+        while job.pending:
+            time.sleep(0.01)
+        assert job.state == "cancelled", f"{tab}: old job {job.state}"
+        assert d.figure_cache.peek(app.panel_key(old, tab)) is None
+
+    print(f"Job queue cold / warm / shared / cancel: OK {app.jobs.stats()}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
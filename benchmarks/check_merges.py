@@ -0,0 +1,100 @@
+# benchmarks/check_merges.py — regression check for the merge engine
+#
+#   python -m benchmarks.check_merges [path/to/brfss.csv]
+#
+# Compares utils.merges against the original R-mirroring implementation
+# (one Series.str pass per rule, kept below as the reference) on a table
+# of edge cases — substring quirks, chained codes, missing values — and,
+# if a CSV is given or configured, on every row of the real data.
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.config import DATA_CSV
+from utils.merge_rules import (
+    RESPONSE_ID_REPLACEMENTS,
+    RESPONSE_LABELS,
+    BREAKOUT_ID_REPLACEMENTS,
+    BREAK_OUT_LABELS,
+)
+from utils.merges import apply_all_merges
+
+
+# ----------------------------------------------------------
+# REFERENCE (the pre-engine implementation)
+# ----------------------------------------------------------
+def _ref_replace(series, rules):
+    s = series.astype("string").copy()
+    for old, new in rules:
+        s = s.str.replace(old, new, regex=False)
+    return s
+
+
+def _ref_label(ids, labels, rules, lower=False):
+    ids = ids.astype("string")
+    out = labels.astype("string").copy()
+    for code, new in rules:
+        out.loc[ids.str.contains(code, na=False)] = new
+    return out.str.lower() if lower else out
+
+
+def reference_merges(qdf):
+    df = qdf.copy()
+    df["ResponseID"] = _ref_replace(df["ResponseID"], RESPONSE_ID_REPLACEMENTS)
+    df["Response"] = _ref_label(df["ResponseID"], df["Response"], RESPONSE_LABELS, lower=True)
+    df["BreakoutID"] = _ref_replace(df["BreakoutID"], BREAKOUT_ID_REPLACEMENTS)
+    df["Break_Out"] = _ref_label(df["BreakoutID"], df["Break_Out"], BREAK_OUT_LABELS)
+    return df
+
+
+EDGE_CASES = pd.DataFrame({
+    "ResponseID": ["RESP025", "RESP0250", "xRESP196", "RESP199", "RESP200",
+                   "RESP046", None, "RESP230", "RESP137", "RESP194"],
+    "Response": ["Employed for wages", "Other", "Asian", None, "Multi",
+                 "Yes", "No", "$50-75k", None, "WHITE"],
+    "BreakoutID": ["INCOME06", "INCOME055", "RACE08", "RACE03", "RACE07",
+                   "RACE011", None, "INCOME5", "AGE01", "RACE2RACE4"],
+    "Break_Out": ["$50-75k", "x", "Hispanic", "Other", None,
+                  "White", "Unknown", "$50k+", "18-24", "y"],
+})
+
+
+def _compare(raw, label):
+    expected = reference_merges(raw)
+    got = apply_all_merges(raw)
+    for c in ["ResponseID", "Response", "BreakoutID", "Break_Out"]:
+        a = expected[c].astype(object).where(expected[c].notna(), None).to_numpy()
+        b = got[c].astype(object).where(got[c].notna(), None).to_numpy()
+        if not np.array_equal(a, b):
+            bad = np.flatnonzero(a != b)[:5]
+            raise AssertionError(f"{label}: {c} differs at rows {bad.tolist()}: "
+                                 f"{a[bad].tolist()} != {b[bad].tolist()}")
+    print(f"{label}: OK ({len(raw):,} rows)")
+
+
+def main(csv_path=DATA_CSV):
+    _compare(EDGE_CASES, "edge cases")
+    _compare(EDGE_CASES.astype("category"), "edge cases (categorical)")
+
+    if not os.path.exists(csv_path):
+        print(f"{csv_path} not found — skipping full-data check")
+        return
+
+    cols = ["ResponseID", "Response", "BreakoutID", "Break_Out"]
+    raw = pd.read_csv(csv_path, usecols=cols, dtype="category")
+
+    t0 = time.perf_counter()
+    _compare(raw, "full data")
+    t_ref = time.perf_counter()
+    reference_merges(raw)
+    t1 = time.perf_counter()
+    apply_all_merges(raw)
+    t2 = time.perf_counter()
+    print(f"reference {t1 - t_ref:.2f}s, engine {t2 - t1:.3f}s (check {t_ref - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else DATA_CSV)
@@ -0,0 +1,53 @@
+# benchmarks/check_refresh.py — change detection of the incremental refresh
+#
+#   python -m benchmarks.check_refresh [rows]
+#
+# On synthetic data (benchmarks/synthetic.py), in a temporary cache:
+#   * an unmodified year of the served data, re-exported as a delta,
+#     changes nothing — even though that year has no missing values, so
+#     its numerics are read back in narrower dtypes than the served ones
+#   * one edited row changes exactly its question
+import os
+import sys
+import tempfile
+
+from benchmarks.synthetic import generate
+from utils.ingest import load_dataset
+from utils.refresh import refresh
+
+
+def main(n_rows=50_000):
+    with tempfile.TemporaryDirectory(prefix="brfss-refresh-") as tmp:
+        base = generate(n_rows, seed=1)
+        year = int(base["Year"].max())
+        in_year = base["Year"] == year
+        # No NaN in this year only: the base stores Sample_Size as float,
+        # the delta reads it as integers
+        for c in ["Sample_Size", "Data_value"]:
+            base.loc[in_year, c] = base.loc[in_year, c].fillna(10.0)
+        assert base["Sample_Size"].isna().any()
+
+        csv_path = os.path.join(tmp, "base.csv")
+        cache_dir = os.path.join(tmp, "cache")
+        base.to_csv(csv_path, index=False)
+        load_dataset(csv_path, cache_dir)
+
+        delta = base[in_year]
+        same = os.path.join(tmp, "same.csv")
+        delta.to_csv(same, index=False)
+        changed = refresh(same, csv_path, cache_dir, workers=1)
+        assert changed == [], f"unmodified year: {len(changed)} questions reported changed"
+
+        edited = delta.copy()
+        row = edited.index[0]
+        edited.loc[row, "Data_value"] = edited.loc[row, "Data_value"] + 1
+        edit = os.path.join(tmp, "edit.csv")
+        edited.to_csv(edit, index=False)
+        changed = refresh(edit, csv_path, cache_dir, workers=1)
+        assert changed == [edited.loc[row, "Question"]], f"one edited row: {changed}"
+
+    print(f"Refresh change detection: OK ({n_rows:,} rows, unmodified and edited year {year})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
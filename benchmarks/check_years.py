@@ -0,0 +1,58 @@
+# benchmarks/check_years.py — year windows vs. a fresh aggregation
+#
+#   python -m benchmarks.check_years [path/to/brfss.csv]
+#
+# Every panel of every question over a few year windows, read from the
+# cumulative per-year sums (utils/years.py), must match compute_panel
+# over the rows of those years — same groups, same order, metrics equal
+# up to float summation order — both when each question's sums are built
+# on their own and when all of them come from one batched pass (as for
+# the Compare tab).
+import sys
+
+import pandas as pd
+
+from benchmarks.check_backends import _compare
+from utils.aggregation import PANELS, compute_all_panels
+from utils.backends import PandasBackend
+from utils.cache import QuestionCache
+from utils.config import DATA_CSV
+from utils.ingest import load_dataset
+from utils.options import survey_years
+from utils.prepare import build_question_index, load_question
+from utils.years import YearCache
+
+
+def main(csv_path=DATA_CSV):
+    df = load_dataset(csv_path)
+    index = build_question_index(df)
+    backend = PandasBackend(QuestionCache(df, index))
+    year_cache = YearCache(backend, max_questions=1)
+
+    years = survey_years(df)
+    mid = years[len(years) // 2]
+    windows = [(years[0], years[-1]), (years[0], years[0]), (mid, years[-1]), (mid, mid)]
+
+    batched = YearCache(backend, max_questions=len(index))
+    batched.windows(list(index), "overall", *windows[0])
+    assert batched.misses == len(index)
+
+    for q in index:
+        qdf = load_question(df, q, index)
+        year = pd.to_numeric(qdf["Year"], errors="coerce")
+        for start, end in windows:
+            expected = compute_all_panels(qdf[(year >= start) & (year <= end)])
+            for panel in PANELS:
+                _compare(expected[panel].reset_index(drop=True),
+                         year_cache.window(q, panel, start, end),
+                         f"{q!r} {panel} {start}–{end}")
+                _compare(expected[panel].reset_index(drop=True),
+                         batched.window(q, panel, start, end),
+                         f"{q!r} {panel} {start}–{end} (batched)")
+
+    print(f"Year windows match compute_panel: OK "
+          f"({len(index):,} questions × {len(PANELS)} panels × {len(windows)} windows)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else DATA_CSV)
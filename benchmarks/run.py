@@ -0,0 +1,239 @@
+# benchmarks/run.py — pipeline benchmark suite on synthetic BRFSS data
+#
+#   python -m benchmarks.run [--scale 1 5 20] [--save NAME] [--compare NAME]
+#
+# Times every pipeline stage and end-to-end panel callback execution,
+# and reports peak traced memory (tracemalloc; covers numpy/pandas
+# buffers, not Arrow's own allocator). Data is generated once per scale under
+# benchmarks/.data/ and reused; results can be saved as a named baseline
+# in benchmarks/baselines/ and compared against later runs.
+import argparse
+import gc
+import importlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, ".data")
+BASELINE_DIR = os.path.join(HERE, "baselines")
+
+PANELS = [
+    "overall", "gender", "age", "race", "education", "income", "temporal", "state",
+]
+
+
+def measure(fn, repeat=1):
+    """
+    (best seconds, peak traced MB, result) of fn().
+
+    Timing runs are untraced; peak memory comes from one extra run under
+    tracemalloc, which would otherwise distort the timings badly.
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def dataset(scale, seed=0):
+    from benchmarks.synthetic import write_csv
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"brfss-x{scale:g}-s{seed}.csv")
+    if not os.path.exists(path):
+        print(f"generating {path} ...", flush=True)
+        write_csv(path, scale, seed)
+    return path
+
+
+def use_config(**env):
+    """
+    Set BRFSS_* variables and drop the imported app / utils modules:
+    utils.config (and every `from utils.config import ...`) reads the
+    environment at import time, so the next import sees these values.
+    """
+    os.environ.update(env)
+    for name in list(sys.modules):
+        if name == "app" or name == "utils" or name.startswith("utils."):
+            del sys.modules[name]
+
+
+def ingest_stages(record, csv_path, cache_dir):
+    """Source read and merges, then a cold cache build and warm load; the frame."""
+    from utils import ingest
+    from utils.merges import apply_all_merges
+
+    raw = record("ingest.read_source_csv", lambda: ingest.read_source_csv(csv_path))
+    record("ingest.apply_all_merges", lambda: apply_all_merges(raw), rows=len(raw))
+
+    # Cold cache build, then warm load
+    for stale in ("brfss", "options"):
+        p = getattr(ingest, "cache_path" if stale == "brfss" else "options_path")(csv_path, cache_dir)
+        if os.path.exists(p):
+            os.remove(p)
+    record("ingest.build_cache", lambda: ingest.build_cache(csv_path, cache_dir))
+    return record("ingest.load_dataset", lambda: ingest.load_dataset(csv_path, cache_dir))
+
+
+def question_stages(record, df, index, questions, q_rows):
+    """Per-question stages over the given questions (q_rows rows in all)."""
+    from utils.aggregation import compute_all_panels, partial_sums, compute_panel
+    from utils.merges import apply_all_merges
+    from utils.prepare import load_question, select_question
+
+    record("prepare.select_question[scan]",
+           lambda: [select_question(df, q) for q in questions], rows=q_rows)
+    record("prepare.load_question[index]",
+           lambda: [load_question(df, q, index) for q in questions], repeat=3, rows=q_rows)
+
+    qdfs = [load_question(df, q, index) for q in questions]
+    raw_qdfs = [select_question(df, q, index) for q in questions]
+    record("merges.apply_all_merges[q]",
+           lambda: [apply_all_merges(x) for x in raw_qdfs], repeat=3, rows=q_rows)
+    record("aggregation.partial_sums",
+           lambda: [partial_sums(x) for x in qdfs], repeat=3, rows=q_rows)
+    record("aggregation.compute_panel",
+           lambda: [compute_panel(x, "CAT4", ["Break_Out"]) for x in qdfs], repeat=3, rows=q_rows)
+    record("aggregation.compute_all_panels",
+           lambda: [compute_all_panels(x) for x in qdfs], repeat=3, rows=q_rows)
+
+
+def run_scale(scale, n_questions=5, cube=True):
+    csv_path = dataset(scale)
+    cache_dir = os.path.join(DATA_DIR, f"cache-x{scale:g}")
+
+    # The app-callback stages below run the app in live mode
+    use_config(BRFSS_CSV=csv_path, BRFSS_CACHE_DIR=cache_dir, BRFSS_PANEL_MODE="live")
+
+    from utils.cube import build_cube
+    from utils.options import build_option_tree
+    from utils.prepare import build_question_index
+
+    results = {}
+
+    def record(stage, fn, repeat=1, rows=None):
+        seconds, peak, out = measure(fn, repeat)
+        results[stage] = {"seconds": seconds, "peak_mb": peak}
+        if rows is not None:
+            results[stage]["rows"] = int(rows)
+        print(f"  {stage:<28} {seconds * 1000:>10.1f} ms {peak:>9.1f} MB", flush=True)
+        return out
+
+    print(f"scale x{scale:g}: {csv_path}")
+    # Each stage group runs in its own function, so the frames it builds
+    # are freed when it returns
+    df = ingest_stages(record, csv_path, cache_dir)
+    results["ingest.load_dataset"]["rows"] = len(df)
+
+    index = record("prepare.build_question_index", lambda: build_question_index(df))
+    record("options.build_option_tree", lambda: build_option_tree(df))
+
+    sizes = df["Question"].value_counts()
+    questions = sizes.index[:n_questions].tolist()   # the largest questions
+    q_rows = int(sizes.iloc[:n_questions].sum())
+
+    question_stages(record, df, index, questions, q_rows)
+    if cube:
+        record("cube.build_cube", lambda: build_cube(df, index), rows=len(df))
+
+    # End-to-end callbacks: fresh app import, live mode, cold then warm
+    # app.import: until the server can answer (data loads in the
+    # background); app.ready: until panels can be served
+    imported = []
+
+    def import_app():
+        sys.modules.pop("app", None)
+        imported.append(importlib.import_module("app"))
+        return imported[-1]
+
+    def import_ready():
+        module = import_app()
+        module.wait_ready()
+        return module
+
+    record("app.import", import_app)
+    for module in imported:
+        module.wait_ready()
+    app = record("app.ready", import_ready)
+    for module in imported:
+        module.wait_ready()
+
+    def all_panels(q):
+        return [app.render_panel(panel, q, "all") for panel in PANELS]
+
+    def cold():
+        app.data.question_cache.clear()
+        return [all_panels(q) for q in questions]
+
+    record("callbacks.cold[8 panels]", cold)
+    record("callbacks.warm[8 panels]", lambda: [all_panels(q) for q in questions], repeat=3)
+    record("callbacks.filter[more]",
+           lambda: [app.render_panel(panel, q, "more") for q in questions for panel in PANELS],
+           repeat=3)
+    sys.modules.pop("app", None)
+
+    return results
+
+
+def compare(current, baseline):
+    print(f"\n{'stage':<40} {'time':>9} {'peak mem':>9}   (current / baseline)")
+    for scale, stages in current.items():
+        for stage, now in stages.items():
+            old = baseline.get(scale, {}).get(stage)
+            if not old:
+                continue
+            t = now["seconds"] / old["seconds"] if old["seconds"] else float("nan")
+            m = now["peak_mb"] / old["peak_mb"] if old["peak_mb"] else float("nan")
+            flag = "  <-- slower" if t > 1.2 else ""
+            print(f"x{scale:<4} {stage:<34} {t:>8.2f}x {m:>8.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, nargs="+", default=[1.0],
+                        help="dataset sizes as multiples of the real file (e.g. 1 5 20)")
+    parser.add_argument("--questions", type=int, default=5,
+                        help="how many (largest) questions the per-question stages use")
+    parser.add_argument("--skip-cube", action="store_true",
+                        help="skip the (slow) full cube build stage")
+    parser.add_argument("--save", metavar="NAME", help="save results as baseline NAME")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baseline NAME")
+    args = parser.parse_args(argv)
+
+    current = {f"{s:g}": run_scale(s, args.questions, not args.skip_cube) for s in args.scale}
+
+    if args.compare:
+        path = os.path.join(BASELINE_DIR, f"{args.compare}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                compare(current, json.load(f)["results"])
+        else:
+            print(f"\nno baseline {path} to compare against")
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version.split()[0],
+                "results": current,
+            }, f, indent=2)
+        print(f"\nbaseline saved → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/synthetic.py — deterministic BRFSS-shaped data generator
+#
+#   python -m benchmarks.synthetic out.csv [scale] [seed]
+#
+# Produces the CDC export's columns (the ones the app reads plus the
+# usual unused ones) with realistic Class/Topic/Question cardinality,
+# CAT1–CAT6 breakouts, legacy RESP/INCOME/RACE codes that the merge
+# rules rewrite, suppressed values and US/UW national rows.
+# scale=1 is roughly the size of the real 2011–present file.
+import sys
+
+import numpy as np
+import pandas as pd
+
+REAL_ROWS = 2_000_000       # approx. rows in the 2011–present export
+
+N_CLASSES = 14
+N_TOPICS = 90
+N_QUESTIONS = 210
+
+YEARS = list(range(2011, 2025))
+
+STATES = [
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "DC", "FL", "GA", "HI",
+    "ID", "IL", "IN", "IA", "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN",
+    "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND", "OH",
+    "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA",
+    "WV", "WI", "WY", "PR", "GU", "VI",
+]
+NATIONAL = ["US", "UW"]
+
+# BreakOutCategoryID -> [(BreakoutID, Break_Out)], legacy codes included
+BREAKOUTS = {
+    "CAT1": [("BO1", "Overall")],
+    "CAT2": [("SEX1", "Male"), ("SEX2", "Female")],
+    "CAT3": [("AGE01", "18-24"), ("AGE02", "25-34"), ("AGE03", "35-44"),
+             ("AGE04", "45-54"), ("AGE05", "55-64"), ("AGE09", "65+")],
+    "CAT4": [("RACE01", "White, non-Hispanic"), ("RACE02", "Black, non-Hispanic"),
+             ("RACE03", "American Indian or Alaskan Native, non-Hispanic"),
+             ("RACE04", "Asian, non-Hispanic"),
+             ("RACE05", "Native Hawaiian or other Pacific Islander, non-Hispanic"),
+             ("RACE06", "Other, non-Hispanic"), ("RACE07", "Multiracial, non-Hispanic"),
+             ("RACE08", "Hispanic")],
+    "CAT5": [("EDUCA1", "Less than H.S."), ("EDUCA2", "H.S. or G.E.D."),
+             ("EDUCA3", "Some post-H.S."), ("EDUCA4", "College graduate")],
+    "CAT6": [("INCOME01", "Less than $15,000"), ("INCOME02", "$15,000-$24,999"),
+             ("INCOME03", "$25,000-$34,999"), ("INCOME04", "$35,000-$49,999"),
+             ("INCOME05", "$50,000+"), ("INCOME06", "$50,000-$74,999"),
+             ("INCOME07", "$75,000+"), ("INCOME5", "$50,000+")],
+}
+CATEGORY_NAMES = {
+    "CAT1": "Overall", "CAT2": "Sex", "CAT3": "Age Group",
+    "CAT4": "Race/Ethnicity", "CAT5": "Education Attained",
+    "CAT6": "Household Income",
+}
+# CAT1 rows feed three panels (overall, temporal, state)
+CATEGORY_WEIGHTS = [0.25, 0.10, 0.18, 0.20, 0.12, 0.15]
+
+# Response sets questions draw from (ResponseID, Response)
+RESPONSE_SETS = [
+    [("RESP046", "Yes"), ("RESP054", "No")],
+    [("RESP056", "Excellent"), ("RESP057", "Very good"), ("RESP058", "Good"),
+     ("RESP059", "Fair"), ("RESP060", "Poor")],
+    [("RESP025", "Employed for wages"), ("RESP026", "Self-employed"),
+     ("RESP029", "A homemaker"), ("RESP137", "Employed"), ("RESP027", "Out of work")],
+    [("RESP230", "$50,000-$74,999"), ("RESP231", "$75,000+"), ("RESP232", "$50,000+"),
+     ("RESP019", "Less than $15,000")],
+    [("RESP194", "White"), ("RESP195", "Black"), ("RESP196", "Asian"),
+     ("RESP197", "Native Hawaiian"), ("RESP198", "American Indian"),
+     ("RESP200", "Multiracial")],
+    [("RESP001", "Obese (BMI 30.0 - 99.8)"), ("RESP002", "Overweight (BMI 25.0-29.9)"),
+     ("RESP003", "Normal Weight (BMI 18.5-24.9)"), ("RESP004", "Underweight (BMI 12.0-18.4)")],
+]
+
+UNUSED_COLS = {
+    "Locationdesc": "Somewhere",
+    "Break_Out_Category": None,
+    "Confidence_limit_Low": 0.0,
+    "Confidence_limit_High": 0.0,
+    "Display_order": 1,
+    "Data_value_unit": "%",
+    "Data_value_type": "Crude Prevalence",
+    "Data_Value_Footnote_Symbol": None,
+    "Data_Value_Footnote": None,
+    "DataSource": "BRFSS",
+    "ClassId": "CLASS01",
+    "TopicId": "TOPIC01",
+    "LocationID": 1,
+    "QuestionID": "Q01",
+    "GeoLocation": "(32.84057112200048, -86.63186076199969)",
+}
+
+COLUMNS = [
+    "Year", "Locationabbr", "Locationdesc", "Class", "Topic", "Question",
+    "Response", "Break_Out", "Break_Out_Category", "Sample_Size", "Data_value",
+    "Confidence_limit_Low", "Confidence_limit_High", "Display_order",
+    "Data_value_unit", "Data_value_type", "Data_Value_Footnote_Symbol",
+    "Data_Value_Footnote", "DataSource", "ClassId", "TopicId", "LocationID",
+    "BreakoutID", "BreakOutCategoryID", "GeoLocation", "ResponseID", "QuestionID",
+]
+
+
+def _catalog(seed):
+    """Fixed question catalog: class, topic, response set and popularity."""
+    rng = np.random.default_rng(seed)
+    topics = [(f"Class {t % N_CLASSES:02d}", f"Topic {t:02d}") for t in range(N_TOPICS)]
+    questions = []
+    for q in range(N_QUESTIONS):
+        cls, topic = topics[q % N_TOPICS]
+        questions.append({
+            "Class": cls,
+            "Topic": topic,
+            "Question": f"Synthetic question {q:03d}: have you ever been told you have condition {q}?",
+            "responses": RESPONSE_SETS[rng.integers(len(RESPONSE_SETS))],
+        })
+    # Skewed question sizes, like the real file
+    weights = 1.0 / np.arange(1, N_QUESTIONS + 1) ** 0.6
+    rng.shuffle(weights)
+    return questions, weights / weights.sum()
+
+
+def generate(n_rows, seed=0, chunk=0):
+    """
+    DataFrame of n_rows BRFSS-shaped rows (same seed → same data).
+    Chunks of one seed share the question catalog but not their rows.
+    """
+    questions, q_weights = _catalog(seed)
+    rng = np.random.default_rng([seed, chunk])
+
+    q_idx = rng.choice(len(questions), size=n_rows, p=q_weights)
+    cats = np.array(list(BREAKOUTS))
+    cat = cats[rng.choice(len(cats), size=n_rows, p=CATEGORY_WEIGHTS)]
+
+    breakout_id = np.empty(n_rows, dtype=object)
+    break_out = np.empty(n_rows, dtype=object)
+    for c, options in BREAKOUTS.items():
+        rows = np.flatnonzero(cat == c)
+        pick = rng.integers(len(options), size=len(rows))
+        breakout_id[rows] = np.array([o[0] for o in options], dtype=object)[pick]
+        break_out[rows] = np.array([o[1] for o in options], dtype=object)[pick]
+
+    response_id = np.empty(n_rows, dtype=object)
+    response = np.empty(n_rows, dtype=object)
+    for i, q in enumerate(questions):
+        rows = np.flatnonzero(q_idx == i)
+        pick = rng.integers(len(q["responses"]), size=len(rows))
+        response_id[rows] = np.array([r[0] for r in q["responses"]], dtype=object)[pick]
+        response[rows] = np.array([r[1] for r in q["responses"]], dtype=object)[pick]
+
+    locations = np.array(STATES + NATIONAL, dtype=object)
+    loc_weights = np.r_[np.full(len(STATES), 1.0), np.full(len(NATIONAL), 1.5)]
+    location = locations[rng.choice(len(locations), size=n_rows, p=loc_weights / loc_weights.sum())]
+
+    sample_size = rng.lognormal(5.5, 1.2, n_rows).round()
+    data_value = rng.beta(2, 3, n_rows).round(3) * 100
+    # Suppressed / missing estimates
+    data_value[rng.random(n_rows) < 0.04] = np.nan
+    sample_size[rng.random(n_rows) < 0.02] = np.nan
+    data_value[rng.random(n_rows) < 0.005] = 0.0
+
+    qframe = pd.DataFrame(questions)
+    df = pd.DataFrame({
+        "Year": np.array(YEARS)[rng.integers(len(YEARS), size=n_rows)],
+        "Locationabbr": location,
+        "Class": qframe["Class"].to_numpy()[q_idx],
+        "Topic": qframe["Topic"].to_numpy()[q_idx],
+        "Question": qframe["Question"].to_numpy()[q_idx],
+        "Response": response,
+        "Break_Out": break_out,
+        "Sample_Size": sample_size,
+        "Data_value": data_value,
+        "BreakoutID": breakout_id,
+        "BreakOutCategoryID": cat,
+        "ResponseID": response_id,
+    })
+    df["Break_Out_Category"] = df["BreakOutCategoryID"].map(CATEGORY_NAMES)
+    for col, value in UNUSED_COLS.items():
+        if col not in df:
+            df[col] = value
+    return df[COLUMNS]
+
+
+def write_csv(path, scale=1.0, seed=0, chunk_rows=500_000):
+    """Write scale × REAL_ROWS rows to path without holding them all in memory."""
+    total = int(REAL_ROWS * scale)
+    written = 0
+    chunk_no = 0
+    while written < total:
+        n = min(chunk_rows, total - written)
+        chunk = generate(n, seed=seed, chunk=chunk_no)
+        chunk.to_csv(path, mode="w" if written == 0 else "a",
+                     header=written == 0, index=False)
+        written += n
+        chunk_no += 1
+    return total
+
+
+if __name__ == "__main__":
+    out = sys.argv[1]
+    scale = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    n = write_csv(out, scale, seed)
+    print(f"{n:,} rows → {out}")
@@ -0,0 +1,29 @@
+# gunicorn.conf.py — production serving, one shared copy of the data
+#
+#   gunicorn -c gunicorn.conf.py app:server
+#
+# The master builds the memory-mapped frame/cube (utils/shared.py) once,
+# under the shared build lock, before forking; every worker then maps
+# the same files (and never builds them) instead of loading its own
+# copy of the dataset. Settings: BRFSS_WORKERS (default
+# cpu count), BRFSS_BIND (default 0.0.0.0:8050), plus the usual BRFSS_*
+# variables (utils/config.py).
+import os
+import subprocess
+import sys
+
+# Must be set before utils.config is imported (here and in the workers)
+os.environ.setdefault("BRFSS_INGEST_MODE", "shared")
+
+bind = os.environ.get("BRFSS_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("BRFSS_WORKERS", os.cpu_count() or 1))
+worker_class = "gthread"
+threads = 4
+preload_app = False     # each worker maps the files itself
+timeout = 120
+
+
+def on_starting(server):
+    # In a child process, so the master never holds the full frame
+    if os.environ["BRFSS_INGEST_MODE"] == "shared":
+        subprocess.run([sys.executable, "-m", "utils.shared"], check=True)
@@ -11,9 +11,20 @@ def _missing(df, cols):
 
 
 # ----------------------------------------------------------
-# CORE PANEL COMPUTATION (NOW SAFE)
+# SINGLE PASS: partial sums for every panel at once
 # ----------------------------------------------------------
-def compute_panel(qdf, cat_id, group_cols):
+# Finest grain any panel groups by. Every panel is a roll-up of these.
+PARTIAL_KEYS = [
+    "BreakOutCategoryID", "Break_Out", "Year", "Locationabbr", "Response"
+]
+
+
+def partial_sums(qdf, by=()):
+    """
+    One numeric coercion, one true_ss computation and one groupby over
+    PARTIAL_KEYS for the whole question frame (all categories).
+    by: extra leading keys, e.g. ["Question"] for several questions at once.
+    """
 
     # 0 — Empty input
     if qdf is None or qdf.empty:
@@ -28,58 +39,71 @@ def compute_panel(qdf, cat_id, group_cols):
     if _missing(qdf, required):
         return pd.DataFrame()
 
-    # 2 — Select category
-    df = qdf[qdf["BreakOutCategoryID"] == cat_id].copy()
-    if df.empty:
-        return pd.DataFrame()
-
-    # 3 — DATA VALUE COLUMN (very important)
-    if "Data_Value" in df.columns:
+    # 2 — DATA VALUE COLUMN (very important)
+    if "Data_Value" in qdf.columns:
         val = "Data_Value"
-    elif "Data_value" in df.columns:
+    elif "Data_value" in qdf.columns:
         val = "Data_value"
     else:
         return pd.DataFrame()
 
-    # Convert numerics
-    df["Sample_Size"] = pd.to_numeric(df["Sample_Size"], errors="coerce")
-    df[val] = pd.to_numeric(df[val], errors="coerce")
+    keys = list(by) + [c for c in PARTIAL_KEYS if c in qdf.columns]
+    df = qdf[keys].copy()
+
+    # Convert numerics (float64 whatever the stored dtype, see utils/compact.py)
+    df["persons"] = pd.to_numeric(qdf["Sample_Size"], errors="coerce").astype("float64")
+    df["val"] = pd.to_numeric(qdf[val], errors="coerce").astype("float64")
 
     # Remove missing
-    df = df.dropna(subset=["Sample_Size", val])
-    if df.empty:
-        return pd.DataFrame()
+    df = df.dropna(subset=["persons", "val"])
 
     # Remove national rows
     df = df[~df["Locationabbr"].isin(["US", "UW"])]
+
+    # 3 — Weight/variance calculation (avoid division-by-zero)
+    df = df[df["val"] != 0]
     if df.empty:
         return pd.DataFrame()
 
-    # 4 — If grouping depends on a missing col → stop
-    if _missing(df, group_cols):
+    df["true_ss"] = df["persons"] * 100 / df["val"]
+
+    # 4 — Aggregate (keep NaN keys; each panel drops its own)
+    return df.groupby(keys, observed=True, dropna=False).agg(
+        persons_sum=("persons", "sum"),
+        ss_sum=("true_ss", "sum")
+    ).reset_index()
+
+
+def finalize_panel(partials, cat_id, group_cols):
+    """Roll partial sums up to one panel and add percent + CI."""
+    if partials is None or partials.empty:
         return pd.DataFrame()
 
-    # 5 — Weight/variance calculation
-    df["persons"] = df["Sample_Size"]
-    # avoid division-by-zero
-    df = df[df[val] != 0]
+    # Select category
+    df = partials[partials["BreakOutCategoryID"] == cat_id]
     if df.empty:
         return pd.DataFrame()
 
-    df["true_ss"] = df["persons"] * 100 / df[val]
+    # If grouping depends on a missing col → stop
+    if _missing(df, group_cols):
+        return pd.DataFrame()
 
-    # 6 — Aggregate
-    group = df.groupby(group_cols + ["Response"]).agg(
-        persons_sum=("persons", "sum"),
-        ss_sum=("true_ss", "sum")
+    group = df.groupby(group_cols + ["Response"], observed=True).agg(
+        persons_sum=("persons_sum", "sum"),
+        ss_sum=("ss_sum", "sum")
     ).reset_index()
 
+    return add_ci(group)
+
+
+def add_ci(group):
+    """Percent + CI for summed persons_sum / ss_sum (empty groups dropped)."""
     # Remove invalid
-    group = group[(group["persons_sum"] > 0) & (group["ss_sum"] > 0)]
+    group = group[(group["persons_sum"] > 0) & (group["ss_sum"] > 0)].copy()
     if group.empty:
         return pd.DataFrame()
 
-    # 7 — Percent + Confidence Intervals
+    # Percent + Confidence Intervals
     group["percent"] = group["persons_sum"] * 100 / group["ss_sum"]
 
     # Standard error (safe)
@@ -98,35 +122,75 @@ def compute_panel(qdf, cat_id, group_cols):
 
 
 # ----------------------------------------------------------
-# PANEL WRAPPERS (now safe)
+# CORE PANEL COMPUTATION
+# ----------------------------------------------------------
+def compute_panel(qdf, cat_id, group_cols):
+    return finalize_panel(partial_sums(qdf), cat_id, group_cols)
+
+
+# ----------------------------------------------------------
+# PANEL DEFINITIONS: name -> (BreakOutCategoryID, group columns)
 # ----------------------------------------------------------
+PANELS = {
+    "overall":   ("CAT1", []),
+    "gender":    ("CAT2", ["Break_Out"]),
+    "age":       ("CAT3", ["Break_Out"]),
+    "race":      ("CAT4", ["Break_Out"]),
+    "education": ("CAT5", ["Break_Out"]),
+    "income":    ("CAT6", ["Break_Out"]),
+    "temporal":  ("CAT1", ["Year"]),
+    "state":     ("CAT1", ["Locationabbr"]),
+}
+
+METRIC_COLS = ["persons_sum", "ss_sum", "percent", "sdev", "ci_low", "ci_high"]
+
+
+# ----------------------------------------------------------
+# ALL PANELS OF A QUESTION IN ONE PASS
+# ----------------------------------------------------------
+def compute_all_panels(qdf):
+    """{panel name: summary} for every panel in PANELS."""
+    partials = partial_sums(qdf)
+    return {
+        panel: finalize_panel(partials, cat_id, group_cols)
+        for panel, (cat_id, group_cols) in PANELS.items()
+    }
+
+
+# ----------------------------------------------------------
+# PANEL WRAPPERS (views over the single pass)
+# ----------------------------------------------------------
+def aggregate_panel(qdf, panel):
+    return compute_panel(qdf, *PANELS[panel])
+
+
 def aggregate_overall(qdf):
-    return compute_panel(qdf, "CAT1", [])
+    return aggregate_panel(qdf, "overall")
 
 
 def aggregate_gender(qdf):
-    return compute_panel(qdf, "CAT2", ["Break_Out"])
+    return aggregate_panel(qdf, "gender")
 
 
 def aggregate_age(qdf):
-    return compute_panel(qdf, "CAT3", ["Break_Out"])
+    return aggregate_panel(qdf, "age")
 
 
 def aggregate_race(qdf):
-    return compute_panel(qdf, "CAT4", ["Break_Out"])
+    return aggregate_panel(qdf, "race")
 
 
 def aggregate_education(qdf):
-    return compute_panel(qdf, "CAT5", ["Break_Out"])
+    return aggregate_panel(qdf, "education")
 
 
 def aggregate_income(qdf):
-    return compute_panel(qdf, "CAT6", ["Break_Out"])
+    return aggregate_panel(qdf, "income")
 
 
 def aggregate_temporal(qdf):
-    return compute_panel(qdf, "CAT1", ["Year"])
+    return aggregate_panel(qdf, "temporal")
 
 
 def aggregate_state(qdf):
-    return compute_panel(qdf, "CAT1", ["Locationabbr"])
+    return aggregate_panel(qdf, "state")
@@ -0,0 +1,144 @@
+# utils/backends.py — where live panels are computed
+#
+# A panel is "select question → filter category → weighted groupby →
+# CI". The weighted groupby (utils.aggregation.partial_sums) is the
+# only step that touches row-level data, so that is what a backend
+# provides; the roll-up and CI (finalize_panel) run on its small result
+# and are shared, which keeps every backend on the same formulas.
+#
+#   pandas  — prepared question frames in memory (QuestionCache)
+#   duckdb  — SQL over the parquet files on disk (ingest cache or
+#             stream partitions); only the question's row groups are
+#             read and nothing row-level is held in Python memory
+#
+# Selected with BRFSS_QUERY_BACKEND; the cube, when built, still wins.
+import os
+import threading
+
+from utils.aggregation import PANELS, PARTIAL_KEYS, finalize_panel, partial_sums
+from utils.config import DATA_CSV, CACHE_DIR, INGEST_MODE
+from utils.ingest import cache_path, load_dataset
+from utils.prepare import load_questions
+from utils.stream import load_partitioned
+
+
+class PandasBackend:
+    """Panels from prepared question frames (see utils/cache.py)."""
+
+    name = "pandas"
+
+    def __init__(self, question_cache):
+        self.question_cache = question_cache
+
+    def cached(self, question):
+        """True when the question's panels are already computed."""
+        return question in self.question_cache
+
+    def panel(self, question, panel):
+        return self.question_cache.panels(question)[panel]
+
+    def panels(self, question):
+        return self.question_cache.panels(question)
+
+    def partial_sums(self, question):
+        """aggregation.partial_sums of the question (all categories)."""
+        return partial_sums(self.question_cache.get(question))
+
+    def batch_partials(self, questions):
+        """partial_sums of several questions at once, keyed by Question."""
+        cache = self.question_cache
+        return partial_sums(load_questions(cache.df, questions, cache.index), by=["Question"])
+
+
+class DuckDBBackend:
+    """
+    Panels from SQL over parquet files (one path or a glob). The files
+    must hold harmonized rows, which both the ingest cache and the
+    stream partitions do.
+    """
+
+    name = "duckdb"
+
+    def __init__(self, source):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("BRFSS_QUERY_BACKEND=duckdb needs the duckdb package "
+                              "(pip install duckdb)") from e
+
+        self.source = source
+        self._con = duckdb.connect()    # in-memory catalog, data stays on disk
+        self._local = threading.local()
+
+        columns = self._cursor().execute(
+            "DESCRIBE SELECT * FROM read_parquet(?)", [source]
+        ).df()["column_name"].tolist()
+        self.keys = [c for c in PARTIAL_KEYS if c in columns]
+
+    def cached(self, question):
+        return False    # every panel is a query
+
+    def _cursor(self):
+        # A DuckDB connection is not thread-safe; one cursor per thread
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            cur = self._local.cursor = self._con.cursor()
+        return cur
+
+    def partial_sums(self, question, cat_id=None):
+        """Same table as aggregation.partial_sums(load_question(...))."""
+        where = "Question = ?" + (" AND BreakOutCategoryID = ?" if cat_id else "")
+        return self._partials(self.keys, where, [question] + ([cat_id] if cat_id else []))
+
+    def batch_partials(self, questions):
+        """partial_sums of several questions at once, keyed by Question."""
+        return self._partials(["Question"] + self.keys, "Question IN (SELECT unnest(?))",
+                              [list(questions)])
+
+    def _partials(self, keys, where, params):
+        keys = ", ".join(keys)
+        partials = self._cursor().execute(f"""
+            SELECT {keys},
+                   sum(persons) AS persons_sum,
+                   sum(persons * 100 / val) AS ss_sum
+            FROM (
+                SELECT {keys},
+                       CAST(Sample_Size AS DOUBLE) AS persons,
+                       CAST(Data_value AS DOUBLE) AS val
+                FROM read_parquet(?)
+                WHERE {where}
+            )
+            WHERE persons IS NOT NULL AND NOT isnan(persons)
+              AND val IS NOT NULL AND NOT isnan(val) AND val <> 0
+              AND coalesce(Locationabbr NOT IN ('US', 'UW'), true)
+            GROUP BY ALL
+            ORDER BY ALL
+        """, [self.source] + params).df()
+
+        for c in partials.columns:
+            if partials[c].dtype == object:
+                partials[c] = partials[c].astype("category")
+        return partials
+
+    def panel(self, question, panel):
+        cat_id, group_cols = PANELS[panel]
+        return finalize_panel(self.partial_sums(question, cat_id), cat_id, group_cols)
+
+    def panels(self, question):
+        partials = self.partial_sums(question)
+        return {
+            panel: finalize_panel(partials, cat_id, group_cols)
+            for panel, (cat_id, group_cols) in PANELS.items()
+        }
+
+
+def duckdb_source(csv_path=DATA_CSV, cache_dir=CACHE_DIR):
+    """Parquet path / glob for the DuckDB backend, built first if missing."""
+    if INGEST_MODE == "stream":
+        part_dir = load_partitioned(csv_path, cache_dir).part_dir
+        return os.path.join(part_dir, "part-*.parquet")
+
+    path = cache_path(csv_path, cache_dir)
+    if not os.path.exists(path):
+        load_dataset(csv_path, cache_dir)
+    return path
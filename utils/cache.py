@@ -0,0 +1,127 @@
+# utils/cache.py — per-question preparation cache
+import logging
+import threading
+from collections import OrderedDict
+
+from utils.aggregation import compute_all_panels
+from utils.config import QUESTION_CACHE_MB
+from utils.metrics import stage
+from utils.prepare import load_question
+
+log = logging.getLogger(__name__)
+
+
+class QuestionCache:
+    """
+    Bounded LRU of prepared question frames (the output of load_question)
+    and their panel summaries (compute_all_panels).
+
+    One question selection fires all panel callbacks at once; the first
+    one prepares the frame and the others wait for it, so the filter,
+    numeric coercion, merges, US/UW removal and aggregation run once per
+    question per worker. Entries are evicted least-recently-used once
+    their total memory exceeds max_bytes.
+
+    Cached frames are shared between callbacks — treat them as read-only.
+    """
+
+    def __init__(self, df, index=None, max_bytes=QUESTION_CACHE_MB * 2**20):
+        self.df = df
+        self.index = index
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()   # question -> (qdf, panels, nbytes)
+        self._pending = {}              # question -> threading.Event
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+
+    def __contains__(self, question):
+        with self._lock:
+            return question in self._entries
+
+    def get(self, question):
+        """Prepared question frame."""
+        return self._entry(question)[0]
+
+    def panels(self, question):
+        """{panel name: summary} for the question."""
+        return self._entry(question)[1]
+
+    def _entry(self, question):
+        while True:
+            with self._lock:
+                if question in self._entries:
+                    self._entries.move_to_end(question)
+                    self.hits += 1
+                    return self._entries[question]
+
+                event = self._pending.get(question)
+                if event is None:
+                    event = self._pending[question] = threading.Event()
+                    self.misses += 1
+                    break
+
+            # Another callback is preparing this question right now
+            event.wait()
+
+        try:
+            with stage("load_question") as st:
+                qdf = load_question(self.df, question, self.index)
+                st["rows"] = len(qdf)
+            with stage("compute_all_panels", rows=len(qdf)):
+                panels = compute_all_panels(qdf)
+            entry = self._put(question, qdf, panels)
+        finally:
+            with self._lock:
+                del self._pending[question]
+            event.set()
+
+        log.info("Prepared question (%d rows): %s | %s", len(qdf), question, self.stats())
+        return entry
+
+    def _put(self, question, qdf, panels):
+        nbytes = int(qdf.memory_usage(deep=True).sum())
+        nbytes += sum(int(p.memory_usage(deep=True).sum()) for p in panels.values())
+        entry = (qdf, panels, nbytes)
+        with self._lock:
+            self._entries[question] = entry
+            self.nbytes += nbytes
+
+            # Keep at least the entry just added
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, _, old_bytes) = self._entries.popitem(last=False)
+                self.nbytes -= old_bytes
+                self.evictions += 1
+        return entry
+
+    def successor(self, df, index=None, stale=()):
+        """
+        Cache over refreshed data (utils/refresh.py) that keeps the
+        prepared entries of every question not in stale.
+        """
+        new = QuestionCache(df, index, self.max_bytes)
+        with self._lock:
+            for question, entry in self._entries.items():
+                if question not in stale:
+                    new._entries[question] = entry
+                    new.nbytes += entry[2]
+        return new
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": int(self.max_bytes),
+        }
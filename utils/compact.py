@@ -0,0 +1,87 @@
+# utils/compact.py — compact in-memory layout of the BRFSS frame
+#
+#   python -m utils.compact [path/to/brfss.csv]
+#
+# prints per-column memory of the raw CDC export (every column, strings
+# as objects) next to the frame the app actually holds. Every module
+# reading the frame (options, prepare, aggregation) gets identical
+# results on both.
+import numpy as np
+import pandas as pd
+
+from utils.config import DATA_CSV
+
+# Columns the app reads (utils/prepare.py, utils/options.py,
+# utils/aggregation.py); everything else in the export is dropped
+CATEGORICAL_COLS = [
+    "Class", "Topic", "Question",
+    "Response", "ResponseID",
+    "Break_Out", "BreakoutID", "BreakOutCategoryID",
+    "Locationabbr",
+]
+NUMERIC_COLS = ["Year", "Sample_Size", "Data_value"]
+
+USECOLS = CATEGORICAL_COLS + NUMERIC_COLS
+
+
+def _downcast(s):
+    """Smallest dtype that holds every value of s exactly."""
+    if s.notna().all() and (s == s.round()).all():
+        return pd.to_numeric(s, downcast="integer")
+    small = s.astype("float32")
+    if ((small.astype("float64") == s) | s.isna()).all():
+        return small
+    return s.astype("float64")
+
+
+def compact_frame(df):
+    """
+    Used columns only, repeated strings as categoricals, numerics in
+    the smallest dtype that keeps every value exact. Idempotent.
+    """
+    df = df[[c for c in USECOLS if c in df]].copy()
+    for c in CATEGORICAL_COLS:
+        if c in df and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    for c in NUMERIC_COLS:
+        if c in df:
+            df[c] = _downcast(pd.to_numeric(df[c], errors="coerce"))
+    return df
+
+
+def memory_report(before, after):
+    """Per-column bytes and dtype before / after compaction, plus a total row."""
+    cols = list(before.columns) + [c for c in after.columns if c not in before]
+    rows = []
+    for c in cols:
+        rows.append({
+            "column": c,
+            "before_dtype": str(before[c].dtype) if c in before else "",
+            "before_bytes": int(before[c].memory_usage(deep=True, index=False)) if c in before else 0,
+            "after_dtype": str(after[c].dtype) if c in after else "dropped",
+            "after_bytes": int(after[c].memory_usage(deep=True, index=False)) if c in after else 0,
+        })
+    report = pd.DataFrame(rows).set_index("column")
+    report.loc["TOTAL"] = ["", report["before_bytes"].sum(), "", report["after_bytes"].sum()]
+    report["ratio"] = np.where(
+        report["before_bytes"] > 0,
+        report["after_bytes"] / report["before_bytes"].where(report["before_bytes"] > 0, 1),
+        np.nan
+    )
+    return report
+
+
+def format_report(report):
+    mb = lambda b: f"{b / 2**20:,.2f} MB"
+    out = report.copy()
+    out["before"] = out.pop("before_bytes").map(mb)
+    out["after"] = out.pop("after_bytes").map(mb)
+    out["ratio"] = out["ratio"].map(lambda r: "" if pd.isna(r) else f"{r:.1%}")
+    return out[["before_dtype", "before", "after_dtype", "after", "ratio"]].to_string()
+
+
+if __name__ == "__main__":
+    import sys
+    src = sys.argv[1] if len(sys.argv) > 1 else DATA_CSV
+    raw = pd.read_csv(src, low_memory=False)   # what app.py used to hold
+    print(format_report(memory_report(raw, compact_frame(raw))))
@@ -0,0 +1,54 @@
+# utils/compare.py — one panel for several questions, side by side
+#
+# The Compare tab in app.py shows a panel for up to
+# BRFSS_COMPARE_MAX_QUESTIONS questions at once. compare_panel takes the
+# first source that applies:
+#
+#   year window — per question from its cumulative per-year sums
+#                 (utils/years.py), two column differences each; the
+#                 sums of questions not cached yet come from one
+#                 batch_partials pass
+#   cube        — one lookup per question, no aggregation at all
+#   live        — the rows of all questions selected together (through
+#                 the question index, so only their rows are touched)
+#                 and aggregated with one groupby keyed by Question
+#                 (backend.batch_partials), instead of one
+#                 load_question + compute_panel per question
+import pandas as pd
+
+from utils.aggregation import PANELS, finalize_panel
+from utils.metrics import stage
+from utils.options import has_panel_data
+
+
+def compare_panel(data, questions, panel, window=None):
+    """
+    Summary of panel for every question (plus a Question column) for
+    LiveData data; window: (first year, last year), None for all years.
+    """
+    questions = [q for q in questions if has_panel_data(data.option_tree, q, panel)]
+    if not questions:
+        return pd.DataFrame()
+
+    if window is not None:
+        summaries = data.year_cache.windows(questions, panel, *window)
+        parts = [s.assign(Question=q) for q, s in summaries.items() if not s.empty]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    if data.cube is not None:
+        with stage("cube_lookup") as st:
+            parts = [data.cube.get(q, panel).assign(Question=q) for q in questions]
+            summary = pd.concat(parts, ignore_index=True)
+            st["rows"] = len(summary)
+        return summary
+
+    cat_id, group_cols = PANELS[panel]
+    with stage("batch_partials") as st:
+        partials = data.backend.batch_partials(questions)
+        st["rows"] = len(partials)
+    return finalize_panel(partials, cat_id, ["Question"] + group_cols)
+
+
+def compare_options(tree):
+    """Every question with data in some panel, sorted (Compare tab dropdown)."""
+    return sorted(tree["panels"])
@@ -0,0 +1,83 @@
+# utils/config.py — runtime settings (override with environment variables)
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Raw CDC export (2011–present). Download link is in the README.
+DATA_CSV = os.environ.get(
+    "BRFSS_CSV",
+    os.path.join(BASE_DIR, "data", "BRFSS_Prevalence_Data.csv")
+)
+
+# Where the columnar ingest cache lives.
+CACHE_DIR = os.environ.get(
+    "BRFSS_CACHE_DIR",
+    os.path.join(BASE_DIR, "data", "cache")
+)
+
+# Memory budget for prepared question frames (utils/cache.py), per worker.
+QUESTION_CACHE_MB = float(os.environ.get("BRFSS_QUESTION_CACHE_MB", "256"))
+
+# Where panel summaries come from:
+#   "cube" — precomputed aggregate cube (python -m utils.cube), falling
+#            back to live computation if no cube matches the CSV
+#   "live" — compute_panel on every request
+PANEL_MODE = os.environ.get("BRFSS_PANEL_MODE", "cube")
+
+# Worker processes for building the aggregate cube (python -m utils.cube).
+CUBE_WORKERS = int(os.environ.get("BRFSS_CUBE_WORKERS", os.cpu_count() or 1))
+
+# Instrumentation (utils/metrics.py, served on /metrics)
+# Requests slower than this are logged with their per-stage trace.
+SLOW_REQUEST_MS = float(os.environ.get("BRFSS_SLOW_REQUEST_MS", "1000"))
+# Also append slow traces (one JSON per line) to this file.
+SLOW_TRACE_LOG = os.environ.get("BRFSS_SLOW_TRACE_LOG", "")
+# Track allocation deltas per stage with tracemalloc (adds overhead).
+TRACE_ALLOC = os.environ.get("BRFSS_TRACE_ALLOC", "0") == "1"
+# Only answer /metrics for requests from this machine.
+METRICS_LOCAL_ONLY = os.environ.get("BRFSS_METRICS_LOCAL_ONLY", "1") == "1"
+
+# Render hidden tabs' figures in the background after the active tab renders.
+PREFETCH_TABS = os.environ.get("BRFSS_PREFETCH_TABS", "0") == "1"
+
+# Serialized figure cache (utils/figcache.py): in-memory budget per worker,
+# and an optional directory shared by all workers on the machine.
+FIGURE_CACHE_MB = float(os.environ.get("BRFSS_FIGURE_CACHE_MB", "64"))
+FIGURE_CACHE_DIR = os.environ.get("BRFSS_FIGURE_CACHE_DIR", "")
+
+# Ingest mode:
+#   "memory" — whole dataset in memory (columnar cache, utils/ingest.py)
+#   "stream" — CSV read in bounded chunks into question-bucketed parquet
+#              partitions (utils/stream.py); panels come from the cube and
+#              live computation reads one partition at a time
+#   "shared" — frame and cube memory-mapped from Arrow IPC files, one
+#              copy for every server worker (utils/shared.py)
+INGEST_MODE = os.environ.get("BRFSS_INGEST_MODE", "memory")
+# Approximate peak memory for the streaming ingest.
+STREAM_MEMORY_MB = float(os.environ.get("BRFSS_STREAM_MEMORY_MB", "512"))
+# Seconds between checks for a refreshed dataset (python -m utils.refresh);
+# 0 disables hot swapping in the running app.
+REFRESH_POLL_S = float(os.environ.get("BRFSS_REFRESH_POLL_S", "30"))
+# Live panel backend (utils/backends.py): "pandas" (in-memory frame) or
+# "duckdb" (SQL over the parquet files on disk; needs the duckdb package)
+QUERY_BACKEND = os.environ.get("BRFSS_QUERY_BACKEND", "pandas")
+# Questions aggregated per batch by the bulk export (utils/export.py)
+EXPORT_BATCH_QUESTIONS = int(os.environ.get("BRFSS_EXPORT_BATCH", "25"))
+# Cache warming (utils/warmup.py): at startup precompute every panel of
+# the most-viewed questions (0 disables) ...
+WARM_TOP_N = int(os.environ.get("BRFSS_WARM_TOP_N", "20"))
+# ... and prefetch the default tab of every question in a Topic once a user opens it.
+WARM_TOPICS = os.environ.get("BRFSS_WARM_TOPICS", "1") == "1"
+# Background warming threads, and pending warm-ups kept (oldest dropped first).
+WARM_WORKERS = int(os.environ.get("BRFSS_WARM_WORKERS", "1"))
+WARM_QUEUE = int(os.environ.get("BRFSS_WARM_QUEUE", "256"))
+# Seconds between merges of a worker's question view counts into the cache dir.
+ACCESS_FLUSH_S = float(os.environ.get("BRFSS_ACCESS_FLUSH_S", "60"))
+# Most questions the Compare tab shows side by side (utils/compare.py).
+COMPARE_MAX_QUESTIONS = int(os.environ.get("BRFSS_COMPARE_MAX_QUESTIONS", "6"))
+# Background panel jobs (utils/jobs.py): threads computing cold panels,
+# and how often the page polls a running job (ms).
+JOB_WORKERS = int(os.environ.get("BRFSS_JOB_WORKERS", "2"))
+JOB_POLL_MS = int(os.environ.get("BRFSS_JOB_POLL_MS", "300"))
+# Questions whose cumulative per-year sums (utils/years.py) are kept, per worker.
+YEAR_CACHE_QUESTIONS = int(os.environ.get("BRFSS_YEAR_CACHE_QUESTIONS", "256"))
@@ -0,0 +1,192 @@
+# utils/cube.py — precomputed aggregate cube (every Question × panel)
+#
+# The source data only changes when CDC publishes, so every panel of
+# every question can be computed offline:
+#
+#   python -m utils.cube [path/to/brfss.csv] [workers]
+#
+# The cube is one long parquet table, keyed on the same source
+# fingerprint as the ingest cache, that the dashboard serves panels
+# from as (Question, panel) lookups.
+import glob
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from utils.aggregation import PANELS, METRIC_COLS, compute_all_panels
+from utils.config import DATA_CSV, CACHE_DIR, CUBE_WORKERS
+from utils.ingest import dataset_fingerprint, load_dataset
+from utils.merge_rules import MERGE_RULES_VERSION
+from utils.prepare import build_question_index, load_question
+
+log = logging.getLogger(__name__)
+
+KEY_COLS = ["Question", "panel"]
+GROUP_COLS = ["Break_Out", "Year", "Locationabbr"]
+CUBE_COLS = KEY_COLS + GROUP_COLS + ["Response"] + METRIC_COLS
+
+
+# ----------------------------------------------------------
+# BUILD
+# ----------------------------------------------------------
+def question_panels(qdf, question):
+    """All panels of one prepared question, stacked in cube layout."""
+    parts = []
+    for panel, summary in compute_all_panels(qdf).items():
+        if summary.empty:
+            continue
+        summary.insert(0, "panel", panel)
+        summary.insert(0, "Question", question)
+        parts.append(summary)
+    return parts
+
+
+def assemble_cube(parts):
+    """Concatenate stacked panels into the compact cube table."""
+    if not parts:
+        return pd.DataFrame(columns=CUBE_COLS)
+
+    cube = pd.concat(parts, ignore_index=True).reindex(columns=CUBE_COLS)
+    for c in KEY_COLS + ["Break_Out", "Locationabbr", "Response"]:
+        cube[c] = cube[c].astype("category")
+    cube["Year"] = cube["Year"].astype("Int16")
+    return cube
+
+
+def build_cube(df, index=None, workers=1):
+    if index is None:
+        index = build_question_index(df)
+    if workers > 1 and len(index) > 1:
+        return _build_cube_parallel(df, index, workers)
+
+    parts = []
+    for q in index:
+        parts.extend(question_panels(load_question(df, q, index), q))
+    return assemble_cube(parts)
+
+
+# ----------------------------------------------------------
+# PARALLEL BUILD
+#
+# The frame is written once to an uncompressed Arrow IPC file. Every
+# worker memory-maps it and converts only the row slice of the
+# question it is working on, so the full frame is never pickled.
+# Results come back in question order, so the cube is identical
+# whatever the worker count.
+# ----------------------------------------------------------
+_shared = {}
+
+
+def _worker_init(ipc_path, harmonized):
+    _shared["table"] = feather.read_table(ipc_path, memory_map=True)
+    _shared["harmonized"] = harmonized
+
+
+def _worker_question(task):
+    q, start, stop = task
+    qdf = _shared["table"].slice(start, stop - start).to_pandas()
+    if _shared["harmonized"]:
+        qdf.attrs["merge_rules"] = MERGE_RULES_VERSION
+    return question_panels(load_question(qdf, q), q)
+
+
+def _build_cube_parallel(df, index, workers):
+    # Workers need each question as one contiguous block
+    if not all(isinstance(rows, slice) for rows in index.values()):
+        df = df.sort_values("Question", kind="stable", ignore_index=True)
+        index = build_question_index(df)
+
+    tasks = [(q, rows.start, rows.stop) for q, rows in index.items()]
+    harmonized = df.attrs.get("merge_rules") == MERGE_RULES_VERSION
+
+    tmp_dir = tempfile.mkdtemp(prefix="brfss-cube-")
+    try:
+        ipc_path = os.path.join(tmp_dir, "frame.arrow")
+        feather.write_feather(df, ipc_path, compression="uncompressed")
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_worker_init,
+            initargs=(ipc_path, harmonized)
+        ) as pool:
+            chunk = max(1, len(tasks) // (workers * 8))
+            results = pool.map(_worker_question, tasks, chunksize=chunk)
+            parts = [p for question_parts in results for p in question_parts]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return assemble_cube(parts)
+
+
+def cube_path(csv_path, cache_dir=CACHE_DIR, fp=None):
+    fp = fp or dataset_fingerprint(csv_path, cache_dir)
+    return os.path.join(cache_dir, f"cube-{fp}.parquet")
+
+
+def build_cube_file(csv_path=DATA_CSV, cache_dir=CACHE_DIR, workers=CUBE_WORKERS):
+    df = load_dataset(csv_path, cache_dir)
+    path = cube_path(csv_path, cache_dir)
+
+    log.info("Building aggregate cube %s (%d workers)", path, workers)
+    cube = build_cube(df, workers=workers)
+
+    tmp = path + ".tmp"
+    cube.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+    for old in glob.glob(os.path.join(cache_dir, "cube-*.parquet")):
+        if old != path:
+            os.remove(old)
+    return cube
+
+
+# ----------------------------------------------------------
+# SERVE
+# ----------------------------------------------------------
+class PanelCube:
+    """(Question, panel) → summary lookups over a built cube."""
+
+    def __init__(self, cube):
+        self.cube = cube
+        self.index = {}
+        groups = cube.groupby(KEY_COLS, observed=True, sort=False).indices
+        for key, pos in groups.items():
+            self.index[key] = slice(int(pos[0]), int(pos[-1]) + 1)
+
+    def get(self, question, panel):
+        """Same columns as aggregate_panel(qdf, panel); empty if no data."""
+        rows = self.index.get((question, panel))
+        if rows is None:
+            return pd.DataFrame()
+
+        group_cols = PANELS[panel][1]
+        out = self._take(rows, group_cols + ["Response"] + METRIC_COLS)
+        if "Year" in group_cols:
+            out["Year"] = out["Year"].astype("int16")
+        return out
+
+    def _take(self, rows, columns):
+        return self.cube.iloc[rows][columns].reset_index(drop=True)
+
+
+def load_cube(csv_path=DATA_CSV, cache_dir=CACHE_DIR):
+    """The cube built for the current CSV, or None if there isn't one."""
+    path = cube_path(csv_path, cache_dir)
+    if not os.path.exists(path):
+        return None
+    log.info("Loading aggregate cube %s", path)
+    return PanelCube(pd.read_parquet(path))
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    src = sys.argv[1] if len(sys.argv) > 1 else DATA_CSV
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else CUBE_WORKERS
+    out = build_cube_file(src, workers=n)
+    print(f"{len(out):,} panel rows cached → {cube_path(src)}")
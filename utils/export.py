@@ -0,0 +1,210 @@
+# utils/export.py — bulk export of panel aggregates (CSV / Parquet)
+#
+#   python -m utils.export -o out.csv --class "Chronic Health Indicators" --panel state
+#   GET /export?topic=Asthma&panel=overall&panel=age&format=parquet
+#
+# Questions are selected directly or through whole Classes / Topics
+# (all questions if nothing is given). Rows come from the cube when it
+# is built; otherwise each batch of questions is aggregated with one
+# groupby keyed by Question (backend.batch_partials) instead of a loop
+# over questions. Rows are ordered by question, then panel. Batches are
+# written out as they are computed, so the export never holds more than
+# one batch.
+import io
+import logging
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.aggregation import PANELS, finalize_panel
+from utils.config import EXPORT_BATCH_QUESTIONS
+from utils.cube import CUBE_COLS
+from utils.metrics import stage
+
+log = logging.getLogger(__name__)
+
+EXPORT_COLS = CUBE_COLS
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+SCHEMA = pa.schema([
+    (c, pa.int16() if c == "Year" else
+        pa.string() if c in ("Question", "panel", "Break_Out", "Locationabbr", "Response")
+        else pa.float64())
+    for c in EXPORT_COLS
+])
+
+
+# ----------------------------------------------------------
+# SELECTION
+# ----------------------------------------------------------
+def resolve_questions(tree, questions=(), classes=(), topics=()):
+    """Questions named directly or under the given Classes / Topics (sorted)."""
+    unknown = set(classes) - set(tree["classes"])
+    if unknown:
+        raise ValueError(f"Unknown classes: {sorted(unknown)[:5]}")
+    known_topics = {t for ts in tree["classes"].values() for t in ts}
+    unknown = set(topics) - known_topics
+    if unknown:
+        raise ValueError(f"Unknown topics: {sorted(unknown)[:5]}")
+
+    selected = set(questions)
+    everything = not (questions or classes or topics)
+    for c, class_topics in tree["classes"].items():
+        for t, qs in class_topics.items():
+            if everything or c in classes or t in topics:
+                selected.update(qs)
+
+    known = {q for ts in tree["classes"].values() for qs in ts.values() for q in qs}
+    unknown = selected - known
+    if unknown:
+        raise ValueError(f"Unknown questions: {sorted(unknown)[:5]}")
+    return sorted(selected)
+
+
+def resolve_panels(panels=()):
+    unknown = set(panels) - set(PANELS)
+    if unknown:
+        raise ValueError(f"Unknown panels: {sorted(unknown)} (choose from {list(PANELS)})")
+    return [p for p in PANELS if p in panels] if panels else list(PANELS)
+
+
+# ----------------------------------------------------------
+# BATCHES
+# ----------------------------------------------------------
+def _layout(frame):
+    frame = frame.reindex(columns=EXPORT_COLS)
+    for c in EXPORT_COLS:
+        if SCHEMA.field(c).type == pa.string():
+            frame[c] = frame[c].astype(object).where(frame[c].notna(), None)
+    frame["Year"] = frame["Year"].astype("Int16")
+    return frame.reset_index(drop=True)
+
+
+def _from_cube(cube, questions, panels):
+    parts = []
+    for q in questions:
+        for panel in panels:
+            summary = cube.get(q, panel)
+            if not summary.empty:
+                parts.append(summary.assign(Question=q, panel=panel))
+    return parts
+
+
+def _from_backend(backend, questions, panels):
+    partials = backend.batch_partials(questions)
+    parts = []
+    for panel in panels:
+        cat_id, group_cols = PANELS[panel]
+        summary = finalize_panel(partials, cat_id, ["Question"] + group_cols)
+        if not summary.empty:
+            parts.append(summary.assign(panel=panel))
+    if not parts:
+        return []
+    # Panels were stacked in order: a stable sort groups them per question
+    frame = pd.concat(parts, ignore_index=True)
+    return [frame.sort_values("Question", kind="stable", ignore_index=True)]
+
+
+def iter_batches(data, questions, panels, batch=EXPORT_BATCH_QUESTIONS):
+    """Export rows (EXPORT_COLS) for LiveData data, one batch of questions at a time."""
+    for start in range(0, len(questions), batch):
+        chunk = questions[start:start + batch]
+        with stage("export_batch") as st:
+            if data.cube is not None:
+                parts = _from_cube(data.cube, chunk, panels)
+            else:
+                parts = _from_backend(data.backend, chunk, panels)
+            if not parts:
+                continue
+            frame = _layout(pd.concat(parts, ignore_index=True))
+            st["rows"] = len(frame)
+        yield frame
+
+
+# ----------------------------------------------------------
+# WRITERS (file objects or HTTP streams)
+# ----------------------------------------------------------
+def stream_csv(batches):
+    """CSV text chunks, header first."""
+    header = True
+    for frame in batches:
+        yield frame.to_csv(index=False, header=header)
+        header = False
+    if header:
+        yield ",".join(EXPORT_COLS) + "\n"
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose bytes are taken out after every batch."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def take(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def stream_parquet(batches):
+    """Parquet bytes, one row group per batch."""
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, SCHEMA)
+    for frame in batches:
+        writer.write_table(pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def stream_export(data, questions, panels, fmt="csv"):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (choose from {list(FORMATS)})")
+    batches = iter_batches(data, questions, panels)
+    return stream_csv(batches) if fmt == "csv" else stream_parquet(batches)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from utils.config import DATA_CSV
+    from utils.refresh import LiveData
+
+    parser = argparse.ArgumentParser(description="Export panel aggregates as CSV or Parquet.")
+    parser.add_argument("-o", "--output", required=True, help="output file (.csv or .parquet)")
+    parser.add_argument("--question", action="append", default=[])
+    parser.add_argument("--class", dest="classes", action="append", default=[])
+    parser.add_argument("--topic", action="append", default=[])
+    parser.add_argument("--panel", action="append", default=[], choices=list(PANELS))
+    parser.add_argument("--format", choices=list(FORMATS),
+                        help="default: from the output file extension")
+    parser.add_argument("--csv", default=DATA_CSV, help="source CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".") or "csv"
+    if fmt not in FORMATS:
+        parser.error(f"Unknown format {fmt!r} (choose from {list(FORMATS)}, or pass --format)")
+    data = LiveData.load(args.csv)
+    try:
+        questions = resolve_questions(data.option_tree, args.question, args.classes, args.topic)
+        panels = resolve_panels(args.panel)
+    except ValueError as e:
+        parser.error(str(e))
+
+    mode = "w" if fmt == "csv" else "wb"
+    with open(args.output, mode) as f:
+        for chunk in stream_export(data, questions, panels, fmt):
+            f.write(chunk)
+    print(f"{len(questions):,} questions × {len(panels)} panels → {args.output}")
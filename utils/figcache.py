@@ -0,0 +1,158 @@
+# utils/figcache.py — server-side cache of serialized Plotly figures
+import glob
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from utils.config import FIGURE_CACHE_MB, FIGURE_CACHE_DIR
+
+log = logging.getLogger(__name__)
+
+
+def _questions(part):
+    return part if isinstance(part, tuple) else (part,)
+
+
+class FigureCache:
+    """
+    Figure JSON keyed by (question, panel, filter mode, ...).
+
+    Two tiers:
+      * memory — LRU bounded by max_bytes of JSON, per worker process
+      * disk   — optional directory shared by every worker on the host
+
+    Every key is scoped by the data-source fingerprint, so a new CSV
+    never serves old figures; disk entries of other fingerprints are
+    removed when the cache is created.
+    """
+
+    def __init__(self, fingerprint, max_bytes=FIGURE_CACHE_MB * 2**20,
+                 disk_dir=FIGURE_CACHE_DIR or None):
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+
+        self.disk_dir = None
+        if disk_dir:
+            self.disk_dir = os.path.join(disk_dir, fingerprint)
+            os.makedirs(self.disk_dir, exist_ok=True)
+            for old in glob.glob(os.path.join(disk_dir, "*")):
+                if os.path.isdir(old) and old != self.disk_dir:
+                    shutil.rmtree(old, ignore_errors=True)
+
+        self._entries = OrderedDict()   # key -> json
+        self._parts = {}                # key -> parts
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, parts):
+        raw = "\x1f".join([self.fingerprint] + [str(p) for p in parts])
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def get_or_build(self, parts, build):
+        """Cached JSON for parts, or build() → JSON string, stored in both tiers."""
+        key = self._key(parts)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        data = self._read_disk(key)
+        if data is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            data = build()
+            self._write_disk(key, data)
+
+        self._put(key, parts, data)
+        return data
+
+    def peek(self, parts):
+        """Cached JSON for parts, or None (never builds, not counted in the stats)."""
+        key = self._key(parts)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        return self._read_disk(key)
+
+    def _put(self, key, parts, data):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._parts[key] = parts
+            self.nbytes += len(data)
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old = self._entries.popitem(last=False)
+                del self._parts[old_key]
+                self.nbytes -= len(old)
+                self.evictions += 1
+
+    def successor(self, fingerprint, stale=()):
+        """
+        Cache for refreshed data (utils/refresh.py): in-memory figures
+        of questions (parts[0], or a tuple of questions for comparisons)
+        not in stale move to the new fingerprint.
+        """
+        new = FigureCache(fingerprint, self.max_bytes,
+                          os.path.dirname(self.disk_dir) if self.disk_dir else None)
+        stale = set(stale)
+        with self._lock:
+            kept = [(self._parts[k], data) for k, data in self._entries.items()
+                    if stale.isdisjoint(_questions(self._parts[k][0]))]
+        for parts, data in kept:
+            key = new._key(parts)
+            new._write_disk(key, data)
+            new._put(key, parts, data)
+        return new
+
+    # ---------- disk tier ----------
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key, data):
+        if self.disk_dir is None:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning("Figure cache write failed (%s): %s", path, e)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._parts.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": int(self.max_bytes),
+        }
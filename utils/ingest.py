@@ -0,0 +1,196 @@
+# utils/ingest.py — CSV → columnar cache (parquet)
+import glob
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+
+from utils.compact import CATEGORICAL_COLS, USECOLS, compact_frame
+from utils.config import DATA_CSV, CACHE_DIR
+from utils.merge_rules import MERGE_RULES_VERSION
+from utils.merges import apply_all_merges
+from utils.options import build_option_tree
+
+log = logging.getLogger(__name__)
+
+# Bump when the cached layout changes so old caches are rebuilt.
+# (merge rule changes are picked up through MERGE_RULES_VERSION)
+CACHE_VERSION = "6"
+
+_FP_BLOCK = 1 << 20
+
+# Small row groups let readers of the question-sorted cache skip to one
+# question (min/max statistics), e.g. the DuckDB backend
+ROW_GROUP_ROWS = 1 << 16
+
+
+# ----------------------------------------------------------
+# SOURCE FINGERPRINT
+# ----------------------------------------------------------
+def fingerprint(path):
+    """
+    Cheap fingerprint of the source CSV: size, mtime and a hash of
+    the first/last MB. Changes whenever CDC publishes a new export
+    (or the cache layout / merge rules change).
+    """
+    st = os.stat(path)
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{CACHE_VERSION}.{MERGE_RULES_VERSION}:{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        h.update(f.read(_FP_BLOCK))
+        if st.st_size > _FP_BLOCK:
+            f.seek(max(st.st_size - _FP_BLOCK, _FP_BLOCK))
+            h.update(f.read(_FP_BLOCK))
+    return h.hexdigest()
+
+
+def deltas_path(csv_path, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"deltas-{fingerprint(csv_path)}.json")
+
+
+def read_deltas(csv_path, cache_dir=CACHE_DIR):
+    """Refreshes applied on top of the CSV (utils/refresh.py), oldest first."""
+    try:
+        with open(deltas_path(csv_path, cache_dir)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def dataset_fingerprint(csv_path, cache_dir=CACHE_DIR):
+    """
+    Fingerprint of the data being served: the CSV's, advanced by every
+    incremental refresh applied on top of it. All caches are keyed on it.
+    """
+    deltas = read_deltas(csv_path, cache_dir)
+    return deltas[-1]["fingerprint"] if deltas else fingerprint(csv_path)
+
+
+def cache_path(csv_path, cache_dir=CACHE_DIR, fp=None):
+    fp = fp or dataset_fingerprint(csv_path, cache_dir)
+    return os.path.join(cache_dir, f"brfss-{fp}.parquet")
+
+
+def options_path(csv_path, cache_dir=CACHE_DIR, fp=None):
+    fp = fp or dataset_fingerprint(csv_path, cache_dir)
+    return os.path.join(cache_dir, f"options-{fp}.json")
+
+
+FINGERPRINTED = ["brfss-*.parquet", "options-*.json", "cube-*.parquet", "frame-*.arrow",
+                 "cube-*.arrow"]
+
+
+def drop_fingerprints(cache_dir, keep, patterns=FINGERPRINTED):
+    """Remove the cache files of every dataset fingerprint not in keep."""
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(cache_dir, pattern)):
+            fp = os.path.basename(path).split("-", 1)[1].rsplit(".", 1)[0]
+            if fp not in keep:
+                os.remove(path)
+
+
+# ----------------------------------------------------------
+# CSV → TYPED FRAME
+# ----------------------------------------------------------
+def read_source_csv(csv_path):
+    """Read only the used columns, with compact dtypes (utils/compact.py)."""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    usecols = [c for c in USECOLS if c in header]
+
+    df = pd.read_csv(
+        csv_path,
+        usecols=usecols,
+        dtype={c: "category" for c in CATEGORICAL_COLS if c in usecols},
+        low_memory=False
+    )
+
+    df = compact_frame(df)
+
+    # Question-sorted layout: each question is one contiguous block,
+    # so utils.prepare.build_question_index can hand out slices.
+    # (stable sort keeps the original row order inside a question)
+    df = df.sort_values("Question", kind="stable", ignore_index=True)
+
+    return df
+
+
+def build_cache(csv_path, cache_dir=CACHE_DIR):
+    """Convert the CSV once and write it next to older caches (atomically)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(csv_path, cache_dir)
+
+    log.info("Building ingest cache %s from %s", path, csv_path)
+    df = read_source_csv(csv_path)
+
+    # Harmonize once for the whole dataset instead of per question
+    df = apply_all_merges(df)
+    df.attrs["merge_rules"] = MERGE_RULES_VERSION
+    log.info("%d rows, %.1f MB in memory", len(df), df.memory_usage(deep=True).sum() / 2**20)
+
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False, row_group_size=ROW_GROUP_ROWS)
+    os.replace(tmp, path)
+    write_option_tree(build_option_tree(df), csv_path, cache_dir)
+
+    # Drop caches of older source files
+    for pattern, keep in [("brfss-*.parquet", path),
+                          ("options-*.json", options_path(csv_path, cache_dir)),
+                          ("deltas-*.json", deltas_path(csv_path, cache_dir))]:
+        for old in glob.glob(os.path.join(cache_dir, pattern)):
+            if old != keep:
+                os.remove(old)
+
+    return df
+
+
+def write_option_tree(tree, csv_path, cache_dir=CACHE_DIR, fp=None):
+    path = options_path(csv_path, cache_dir, fp)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(tree, f)
+    os.replace(tmp, path)
+
+
+# ----------------------------------------------------------
+# ENTRY POINT USED BY app.py
+# ----------------------------------------------------------
+def load_dataset(csv_path=DATA_CSV, cache_dir=CACHE_DIR):
+    """
+    Load the BRFSS data from the columnar cache, (re)building it first
+    if the source CSV changed since the last build.
+    """
+    path = cache_path(csv_path, cache_dir)
+    if os.path.exists(path):
+        log.info("Loading ingest cache %s", path)
+        df = pd.read_parquet(path)
+        df.attrs["merge_rules"] = MERGE_RULES_VERSION
+        return df
+
+    # Refreshed data whose cache is gone can't be replayed from the CSV
+    if read_deltas(csv_path, cache_dir):
+        log.warning("Cache for refreshed data is missing — rebuilding from %s only", csv_path)
+        os.remove(deltas_path(csv_path, cache_dir))
+    return build_cache(csv_path, cache_dir)
+
+
+def load_option_tree(df, csv_path=DATA_CSV, cache_dir=CACHE_DIR):
+    """Class → Topic → Question tree stored with the cache (built if missing)."""
+    path = options_path(csv_path, cache_dir)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+
+    tree = build_option_tree(df)
+    os.makedirs(cache_dir, exist_ok=True)
+    write_option_tree(tree, csv_path, cache_dir)
+    return tree
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    src = sys.argv[1] if len(sys.argv) > 1 else DATA_CSV
+    out = build_cache(src)
+    print(f"{len(out):,} rows cached → {cache_path(src)}")
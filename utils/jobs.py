@@ -0,0 +1,195 @@
+# utils/jobs.py — background panel computations with cancellation
+#
+# A cold panel (no cached figure) used to be computed inside the Dash
+# request thread, so a user clicking through questions queued work for
+# questions nobody was looking at any more. app.py now hands cold panels
+# to a JobQueue: BRFSS_JOB_WORKERS threads in this process, no broker.
+#
+#   * identical jobs (same key, e.g. (dataset, question, panel)) that
+#     are queued or running share one run, whichever sessions asked
+#   * a session (one page load) waits on at most one job; asking for
+#     another one, or releasing, cancels the old job unless another
+#     session still waits on it
+#   * a cancelled job is dropped if it has not started, and otherwise
+#     stops at its next pipeline stage (utils.metrics.stage raises
+#     JobCancelled in its thread)
+#   * the stage a job is in is its progress; the page polls it
+#
+# Jobs and sessions are per worker process. Finished figures land in the
+# figure cache, which workers share through BRFSS_FIGURE_CACHE_DIR.
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from utils.config import JOB_WORKERS
+from utils.metrics import on_stage
+
+log = logging.getLogger(__name__)
+
+# Sessions remembered (their last job), oldest forgotten first
+MAX_SESSIONS = 4096
+
+
+class JobCancelled(Exception):
+    """Raised in a job's thread at the first stage after it was cancelled."""
+
+
+class Job:
+    """One computation; state is queued → running → done / failed / cancelled."""
+
+    def __init__(self, key, fn):
+        self.key = key
+        self.fn = fn
+        self.state = "queued"
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.sessions = set()
+        self.created = time.monotonic()
+        self.finished = None
+
+    @property
+    def pending(self):
+        return self.state in ("queued", "running")
+
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.created
+
+
+_local = threading.local()
+
+
+def _checkpoint(stage):
+    job = getattr(_local, "job", None)
+    if job is None:
+        return
+    if job.cancelled:
+        raise JobCancelled(job.key)
+    job.stage = stage
+
+
+on_stage(_checkpoint)
+
+
+class JobQueue:
+    """In-process job queue with deduplication and per-session cancellation."""
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self._queue = OrderedDict()     # key -> Job not started yet, oldest first
+        self._jobs = {}                 # key -> Job queued or running
+        self._sessions = OrderedDict()  # session -> its last Job
+        self._cond = threading.Condition()
+        self._threads = []
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.cancelled = 0
+        self.done = 0
+        self.errors = 0
+
+    def submit(self, session, key, fn):
+        """The job computing fn() under key, started or joined by session."""
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is None or job.cancelled:
+                job = self._jobs[key] = self._queue[key] = Job(key, fn)
+                self.submitted += 1
+                self._start()
+                self._cond.notify()
+            elif session not in job.sessions:
+                self.deduplicated += 1
+            self._attach(session, job)
+            return job
+
+    def session_job(self, session):
+        """The last job session submitted or joined (possibly finished), or None."""
+        with self._cond:
+            return self._sessions.get(session)
+
+    def release(self, session):
+        """session waits on nothing any more; its job is cancelled if nobody else waits."""
+        with self._cond:
+            self._detach(session, self._sessions.pop(session, None))
+
+    def _attach(self, session, job):
+        old = self._sessions.get(session)
+        if old is not job:
+            self._detach(session, old)
+        job.sessions.add(session)
+        self._sessions[session] = job
+        self._sessions.move_to_end(session)
+        while len(self._sessions) > MAX_SESSIONS:
+            stale, old = self._sessions.popitem(last=False)
+            self._detach(stale, old)
+
+    def _detach(self, session, job):
+        if job is None:
+            return
+        job.sessions.discard(session)
+        if job.pending and not job.sessions and not job.cancelled:
+            job.cancelled = True
+            self.cancelled += 1
+            if self._queue.pop(job.key, None) is not None:
+                self._finish(job, "cancelled")
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished = time.monotonic()
+        job.fn = None
+        if self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+
+    def _start(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._run, name=f"brfss-job-{len(self._threads)}",
+                                 daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                _, job = self._queue.popitem(last=False)
+                job.state = "running"
+                fn = job.fn
+
+            _local.job = job
+            try:
+                result = fn()
+            except JobCancelled:
+                state = "cancelled"
+            except Exception as e:
+                state = "failed"
+                job.error = repr(e)
+                log.warning("Job %r failed: %r", job.key, e)
+            else:
+                state = "done"
+                job.result = result
+            finally:
+                _local.job = None
+
+            with self._cond:
+                if state == "done":
+                    self.done += 1
+                elif state == "failed":
+                    self.errors += 1
+                self._finish(job, state)
+
+    def stats(self):
+        with self._cond:
+            queued = len(self._queue)
+            running = len(self._jobs) - queued
+        return {
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "cancelled": self.cancelled,
+            "done": self.done,
+            "errors": self.errors,
+            "queued": queued,
+            "running": running,
+        }
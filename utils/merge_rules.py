@@ -0,0 +1,71 @@
+# utils/merge_rules.py — declarative harmonization rules
+#
+# Mirrors the professor's R merge_*() functions. The engine in
+# utils/merges.py applies them exactly like the R code did:
+#   * *_ID_REPLACEMENTS are substring replacements, applied in order
+#   * *_LABELS overwrite the label of every row whose (merged) ID
+#     *contains* the code; when several codes match, the last one wins
+#
+# Bump MERGE_RULES_VERSION whenever a rule changes — the ingest cache
+# is keyed on it, so harmonized data is rebuilt automatically.
+
+MERGE_RULES_VERSION = "1"
+
+
+# ---------- ResponseID (R: merge_ResponseID) ----------
+RESPONSE_ID_REPLACEMENTS = [
+    ("RESP025", "RESP137"),
+    ("RESP026", "RESP172"),
+    ("RESP029", "RESP141"),
+    ("RESP230", "RESP020"),
+    ("RESP231", "RESP020"),
+    ("RESP232", "RESP020"),
+    ("RESP196", "RESP199"),
+    ("RESP197", "RESP199"),
+    ("RESP198", "RESP199"),
+    ("RESP199", "RESP199"),
+    ("RESP200", "RESP008"),
+    ("RESP194", "RESP005"),
+    ("RESP195", "RESP006"),
+]
+
+# ---------- Response text (R: merge_Response) ----------
+RESPONSE_LABELS = [
+    ("RESP137", "Employed"),
+    ("RESP172", "Self-employed"),
+    ("RESP141", "Homemaker"),
+    ("RESP020", "$50,000+"),
+    ("RESP199", "A/A Native, Asian,Other"),
+    ("RESP008", "Multiracial"),
+    ("RESP005", "White"),
+    ("RESP006", "Black"),
+]
+
+# ---------- BreakoutID (R: merge_BreakoutID) ----------
+BREAKOUT_ID_REPLACEMENTS = [
+    ("INCOME01", "INCOME1"),
+    ("INCOME02", "INCOME2"),
+    ("INCOME03", "INCOME3"),
+    ("INCOME04", "INCOME4"),
+    ("INCOME05", "INCOME5"),
+    ("INCOME06", "INCOME5"),
+    ("INCOME07", "INCOME5"),
+    ("RACE01", "RACE1"),
+    ("RACE02", "RACE2"),
+    ("RACE08", "RACE3"),
+    ("RACE04", "RACE4"),
+    ("RACE05", "RACE4"),
+    ("RACE06", "RACE4"),
+    ("RACE03", "RACE4"),
+    ("RACE07", "RACE5"),
+]
+
+# ---------- Break_Out label (R: merge_Break_Out) ----------
+BREAK_OUT_LABELS = [
+    ("INCOME5", "$50,000+"),
+    ("RACE1", "White"),
+    ("RACE2", "Black"),
+    ("RACE3", "Hispanic"),
+    ("RACE4", "A/A Native, Asian,Other"),
+    ("RACE5", "Multiracial"),
+]
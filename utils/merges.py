@@ -3,6 +3,82 @@
 import pandas as pd
 import numpy as np
 
+from utils.merge_rules import (
+    RESPONSE_ID_REPLACEMENTS,
+    RESPONSE_LABELS,
+    BREAKOUT_ID_REPLACEMENTS,
+    BREAK_OUT_LABELS,
+)
+
+
+# ---------- Mapping engine ----------
+#
+# Every rule is evaluated once per *distinct* value (category), never
+# per row. Rows are then remapped with a single integer lookup on the
+# category codes, so a column costs one pass however many rules exist.
+# Outputs are categoricals with sorted categories.
+
+def _codes(series: pd.Series):
+    """Category codes (-1 = missing) and the distinct values they point to."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
+def _from_codes(codes, values, series: pd.Series) -> pd.Series:
+    """Categorical Series from codes into a (possibly repeating) value list."""
+    # sorted categories keep groupby output in plain string order
+    inverse, cats = pd.factorize(pd.Index(values, dtype=object), sort=True)
+    lookup = np.append(inverse, -1)     # code -1 stays missing
+    return pd.Series(
+        pd.Categorical.from_codes(lookup[codes], cats),
+        index=series.index,
+        name=series.name
+    )
+
+
+def _replace_all(value: str, rules) -> str:
+    # str.replace(old, new, regex=False), in rule order
+    for old, new in rules:
+        value = value.replace(old, new)
+    return value
+
+
+def _last_label(value: str, rules):
+    # str.contains(code) per rule; later rules overwrite earlier ones
+    label = None
+    for code, new in rules:
+        if code in value:
+            label = new
+    return label
+
+
+def _remap(series: pd.Series, rules) -> pd.Series:
+    codes, values = _codes(series)
+    mapped = [_replace_all(str(v), rules) for v in values]
+    return _from_codes(codes, mapped, series)
+
+
+def _relabel(ids: pd.Series, labels: pd.Series, rules, lower=False) -> pd.Series:
+    id_codes, id_values = _codes(ids)
+    lab_codes, lab_values = _codes(labels)
+
+    values = [str(v) for v in lab_values]
+
+    # Rows whose ID matched a rule point past the label categories
+    override = np.full(len(id_values) + 1, -1)     # last slot: missing ID
+    for i, v in enumerate(id_values):
+        label = _last_label(str(v), rules)
+        if label is not None:
+            override[i] = len(values)
+            values.append(label)
+    if lower:
+        values = [v.lower() for v in values]
+
+    codes = override[id_codes]
+    codes = np.where(codes >= 0, codes, lab_codes)
+    return _from_codes(codes, values, labels)
+
 
 # ---------- ResponseID merge (R: merge_ResponseID) ----------
 
@@ -11,28 +87,7 @@ def merge_response_id(series: pd.Series) -> pd.Series:
     Merge older / alternative ResponseID codes into unified ones.
     Mirrors the R merge_ResponseID() function.
     """
-    s = series.astype("string").copy()
-
-    replacements = {
-        "RESP025": "RESP137",
-        "RESP026": "RESP172",
-        "RESP029": "RESP141",
-        "RESP230": "RESP020",
-        "RESP231": "RESP020",
-        "RESP232": "RESP020",
-        "RESP196": "RESP199",
-        "RESP197": "RESP199",
-        "RESP198": "RESP199",
-        "RESP199": "RESP199",
-        "RESP200": "RESP008",
-        "RESP194": "RESP005",
-        "RESP195": "RESP006",
-    }
-
-    for old, new in replacements.items():
-        s = s.str.replace(old, new, regex=False)
-
-    return s
+    return _remap(series, RESPONSE_ID_REPLACEMENTS)
 
 
 # ---------- Response text merge (R: merge_Response) ----------
@@ -41,40 +96,10 @@ def merge_response_text(response_id: pd.Series,
                         response: pd.Series) -> pd.Series:
     """
     Standardize the Response labels based on merged ResponseID.
-    Mirrors the R merge_Response() function.
+    Mirrors the R merge_Response() function, including lower-casing
+    every response.
     """
-    resp_id = response_id.astype("string")
-    resp = response.astype("string").copy()
-
-    # Same logic as in R
-    idx = resp_id.str.contains("RESP137", na=False)
-    resp.loc[idx] = "Employed"
-
-    idx = resp_id.str.contains("RESP172", na=False)
-    resp.loc[idx] = "Self-employed"
-
-    idx = resp_id.str.contains("RESP141", na=False)
-    resp.loc[idx] = "Homemaker"
-
-    idx = resp_id.str.contains("RESP020", na=False)
-    resp.loc[idx] = "$50,000+"
-
-    idx = resp_id.str.contains("RESP199", na=False)
-    resp.loc[idx] = "A/A Native, Asian,Other"
-
-    idx = resp_id.str.contains("RESP008", na=False)
-    resp.loc[idx] = "Multiracial"
-
-    idx = resp_id.str.contains("RESP005", na=False)
-    resp.loc[idx] = "White"
-
-    idx = resp_id.str.contains("RESP006", na=False)
-    resp.loc[idx] = "Black"
-
-    # Make all responses lower case (as in R)
-    resp = resp.str.lower()
-
-    return resp
+    return _relabel(response_id, response, RESPONSE_LABELS, lower=True)
 
 
 # ---------- BreakoutID merge (R: merge_BreakoutID) ----------
@@ -84,30 +109,7 @@ def merge_breakout_id(series: pd.Series) -> pd.Series:
     Merge BreakoutID values where categories were refined over time.
     Mirrors the R merge_BreakoutID() function.
     """
-    s = series.astype("string").copy()
-
-    replacements = {
-        "INCOME01": "INCOME1",
-        "INCOME02": "INCOME2",
-        "INCOME03": "INCOME3",
-        "INCOME04": "INCOME4",
-        "INCOME05": "INCOME5",
-        "INCOME06": "INCOME5",
-        "INCOME07": "INCOME5",
-        "RACE01": "RACE1",
-        "RACE02": "RACE2",
-        "RACE08": "RACE3",
-        "RACE04": "RACE4",
-        "RACE05": "RACE4",
-        "RACE06": "RACE4",
-        "RACE03": "RACE4",
-        "RACE07": "RACE5",
-    }
-
-    for old, new in replacements.items():
-        s = s.str.replace(old, new, regex=False)
-
-    return s
+    return _remap(series, BREAKOUT_ID_REPLACEMENTS)
 
 
 # ---------- Break_Out label merge (R: merge_Break_Out) ----------
@@ -118,28 +120,7 @@ def merge_break_out(breakout_id: pd.Series,
     Standardize Break_Out labels based on merged BreakoutID.
     Mirrors the R merge_Break_Out() function.
     """
-    bid = breakout_id.astype("string")
-    bo = break_out.astype("string").copy()
-
-    idx = bid.str.contains("INCOME5", na=False)
-    bo.loc[idx] = "$50,000+"
-
-    idx = bid.str.contains("RACE1", na=False)
-    bo.loc[idx] = "White"
-
-    idx = bid.str.contains("RACE2", na=False)
-    bo.loc[idx] = "Black"
-
-    idx = bid.str.contains("RACE3", na=False)
-    bo.loc[idx] = "Hispanic"
-
-    idx = bid.str.contains("RACE4", na=False)
-    bo.loc[idx] = "A/A Native, Asian,Other"
-
-    idx = bid.str.contains("RACE5", na=False)
-    bo.loc[idx] = "Multiracial"
-
-    return bo
+    return _relabel(breakout_id, break_out, BREAK_OUT_LABELS)
 
 
 # ---------- High-level helper: clean a question-level dataframe ----------
@@ -147,6 +128,7 @@ def merge_break_out(breakout_id: pd.Series,
 def apply_all_merges(qdf: pd.DataFrame) -> pd.DataFrame:
     """
     Safely apply response + breakout merges without altering panel structure.
+    Works on a single question or on the whole dataset (see utils/ingest.py).
     """
     df = qdf.copy()
 
@@ -169,4 +151,3 @@ def apply_all_merges(qdf: pd.DataFrame) -> pd.DataFrame:
     # If we alter this, ALL panels break.
 
     return df
-
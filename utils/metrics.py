@@ -0,0 +1,221 @@
+# utils/metrics.py — per-callback / per-stage instrumentation
+#
+#   @instrument("update_overall")         around a Dash callback
+#   with stage("load_question", rows=n):  around a pipeline stage
+#
+# Durations, rows processed and (optionally) allocation deltas go into
+# an in-process registry that render() prints in the Prometheus text
+# exposition format (app.py serves it on /metrics). Callbacks slower
+# than SLOW_REQUEST_MS log their full stage trace.
+import functools
+import json
+import logging
+import math
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from utils.config import SLOW_REQUEST_MS, SLOW_TRACE_LOG, TRACE_ALLOC
+
+log = logging.getLogger("brfss.slow")
+if SLOW_TRACE_LOG:
+    _handler = logging.FileHandler(SLOW_TRACE_LOG)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf)
+ROWS_BUCKETS = (10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, math.inf)
+BYTES_BUCKETS = tuple(2**p for p in range(10, 32, 3)) + (math.inf,)
+
+
+# ----------------------------------------------------------
+# REGISTRY
+# ----------------------------------------------------------
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._buckets = {}
+        self._series = {}       # (name, labels) -> Histogram
+        self._collectors = []   # callables returning extra exposition lines
+
+    def histogram(self, name, help_text, buckets):
+        self._help[name] = help_text
+        self._buckets[name] = buckets
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._series.get(key)
+            if hist is None:
+                hist = self._series[key] = Histogram(self._buckets[name])
+            hist.observe(value)
+
+    def add_collector(self, fn):
+        self._collectors.append(fn)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            series = sorted(self._series.items())
+        done = set()
+        for (name, labels), hist in series:
+            if name not in done:
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                done.add(name)
+            running = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                running += n
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{name}_bucket{_labels(labels, le=le)} {running}")
+            lines.append(f"{name}_sum{_labels(labels)} {hist.sum:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+        for fn in self._collectors:
+            lines.extend(fn())
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def gauge(name, help_text, value, **labels):
+    """Exposition lines for a single gauge (for collectors)."""
+    return [
+        f"# HELP {name} {help_text}",
+        f"# TYPE {name} gauge",
+        f"{name}{_labels(sorted(labels.items()))} {value}",
+    ]
+
+
+registry = Registry()
+registry.histogram("brfss_callback_seconds", "Dash callback duration.", SECONDS_BUCKETS)
+registry.histogram("brfss_stage_seconds", "Pipeline stage duration.", SECONDS_BUCKETS)
+registry.histogram("brfss_stage_rows", "Rows processed by a pipeline stage.", ROWS_BUCKETS)
+registry.histogram("brfss_stage_alloc_bytes",
+                   "Net traced allocation per stage (BRFSS_TRACE_ALLOC=1).", BYTES_BUCKETS)
+
+if TRACE_ALLOC and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+# ----------------------------------------------------------
+# TRACING
+# ----------------------------------------------------------
+_local = threading.local()
+_stage_hooks = []
+
+
+def on_stage(hook):
+    """Call hook(name) as every stage starts; it may raise to stop the work (utils/jobs.py)."""
+    _stage_hooks.append(hook)
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Time a pipeline stage inside the current callback (if any)."""
+    for hook in _stage_hooks:
+        hook(name)
+    callback = getattr(_local, "callback", "")
+    mem0 = tracemalloc.get_traced_memory()[0] if TRACE_ALLOC else 0
+    t0 = time.perf_counter()
+    record = {"stage": name}
+    try:
+        yield record
+    finally:
+        elapsed = time.perf_counter() - t0
+        rows = record.get("rows", rows)
+
+        registry.observe("brfss_stage_seconds", elapsed, callback=callback, stage=name)
+        record["ms"] = round(elapsed * 1000, 3)
+        if rows is not None:
+            registry.observe("brfss_stage_rows", rows, callback=callback, stage=name)
+            record["rows"] = int(rows)
+        if TRACE_ALLOC:
+            delta = tracemalloc.get_traced_memory()[0] - mem0
+            registry.observe("brfss_stage_alloc_bytes", max(delta, 0),
+                             callback=callback, stage=name)
+            record["alloc_bytes"] = delta
+
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace.append(record)
+
+
+_active = 0
+_active_lock = threading.Lock()
+
+
+def in_flight():
+    """Number of instrumented callbacks running right now."""
+    return _active
+
+
+def _track(delta):
+    global _active
+    with _active_lock:
+        _active += delta
+
+
+@contextmanager
+def background(name):
+    """Label the stages of work done outside a callback (e.g. cache warming)."""
+    outer = getattr(_local, "callback", None)
+    _local.callback = name
+    try:
+        yield
+    finally:
+        _local.callback = outer
+
+
+def instrument(callback):
+    """Decorator: time a Dash callback and collect its stage trace."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            outer = getattr(_local, "callback", None), getattr(_local, "trace", None)
+            _local.callback, _local.trace = callback, []
+            _track(1)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                _track(-1)
+                registry.observe("brfss_callback_seconds", elapsed, callback=callback)
+                if elapsed * 1000 >= SLOW_REQUEST_MS:
+                    log.warning(json.dumps({
+                        "callback": callback,
+                        "ms": round(elapsed * 1000, 3),
+                        "args": [str(a)[:200] for a in args],
+                        "stages": _local.trace,
+                    }))
+                _local.callback, _local.trace = outer
+        return wrapper
+    return decorate
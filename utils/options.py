@@ -1,3 +1,8 @@
+import pandas as pd
+
+from utils.aggregation import PANELS
+
+
 def get_class_options(df):
     return sorted(df["Class"].dropna().unique().tolist())
 
@@ -17,3 +22,100 @@ def get_question_options(df, selected_class, selected_topic):
             (df["Topic"] == selected_topic)
         ]["Question"].dropna().unique().tolist()
     )
+
+
+# ----------------------------------------------------------
+# PREBUILT OPTION TREE (Class → Topic → Question)
+#
+# Built once at ingest (utils/ingest.py stores it as JSON next to the
+# data cache) so the dropdown cascade is plain dictionary reads.
+# ----------------------------------------------------------
+def build_option_tree(df):
+    """
+    {
+      "classes": {class: {topic: [question, ...]}},   # all sorted
+      "panels":  {question: [panel, ...]}            # panels with data
+    }
+    """
+    triples = df[["Class", "Topic", "Question"]].drop_duplicates()
+
+    classes = {}
+    for c in get_class_options(triples):
+        in_class = triples[triples["Class"] == c]
+        classes[c] = {
+            t: get_question_options(in_class, c, t)
+            for t in get_topic_options(in_class, c)
+        }
+
+    # Rows compute_panel would keep (see aggregation.partial_sums)
+    size = pd.to_numeric(df["Sample_Size"], errors="coerce")
+    value = pd.to_numeric(df["Data_value"], errors="coerce")
+    valid = (
+        (size > 0) & value.notna() & (value != 0) &
+        df["Response"].notna() &
+        ~df["Locationabbr"].isin(["US", "UW"])
+    )
+
+    panels = {}
+    for panel, (cat_id, group_cols) in PANELS.items():
+        rows = valid & (df["BreakOutCategoryID"] == cat_id)
+        for col in group_cols:
+            rows &= df[col].notna()
+        for q in df.loc[rows, "Question"].dropna().unique().tolist():
+            panels.setdefault(q, []).append(panel)
+
+    return {"classes": classes, "panels": panels, "years": survey_years(df)}
+
+
+def survey_years(df):
+    """Sorted survey years in df (bounds of the year-range slider)."""
+    years = pd.to_numeric(df["Year"], errors="coerce").dropna().unique()
+    return sorted(int(y) for y in years)
+
+
+def merge_option_trees(trees):
+    """Union of option trees built over parts of the data (e.g. CSV chunks)."""
+    classes, panels, years = {}, {}, set()
+    for tree in trees:
+        years.update(tree.get("years", ()))
+        for c, topics in tree["classes"].items():
+            for t, questions in topics.items():
+                classes.setdefault(c, {}).setdefault(t, set()).update(questions)
+        for q, names in tree["panels"].items():
+            panels.setdefault(q, set()).update(names)
+
+    return {
+        "classes": {
+            c: {t: sorted(classes[c][t]) for t in sorted(classes[c])}
+            for c in sorted(classes)
+        },
+        "panels": {
+            q: [p for p in PANELS if p in names] for q, names in panels.items()
+        },
+        "years": sorted(years),
+    }
+
+
+def tree_class_options(tree):
+    return list(tree["classes"])
+
+
+def tree_topic_options(tree, selected_class):
+    if not selected_class:
+        return []
+    return list(tree["classes"].get(selected_class, {}))
+
+
+def tree_question_options(tree, selected_class, selected_topic):
+    if not selected_class or not selected_topic:
+        return []
+    return tree["classes"].get(selected_class, {}).get(selected_topic, [])
+
+
+def tree_years(tree):
+    """Survey years, or [] for option trees cached before years were recorded."""
+    return tree.get("years", [])
+
+
+def has_panel_data(tree, question, panel):
+    return panel in tree["panels"].get(question, ())
@@ -1,15 +1,69 @@
+import numpy as np
 import pandas as pd
 from utils.merges import apply_all_merges
+from utils.merge_rules import MERGE_RULES_VERSION
+from utils.metrics import stage
 
-def load_question(df: pd.DataFrame, question_text: str) -> pd.DataFrame:
-    qdf = df[df["Question"] == question_text].copy()
 
+def build_question_index(df: pd.DataFrame) -> dict:
+    """
+    Map each Question to its row positions in df.
+
+    Contiguous blocks (the ingest cache is question-sorted) are stored
+    as slices, anything else as a position array.
+    """
+    index = {}
+    groups = df.groupby("Question", observed=True, sort=False).indices
+    for q, pos in groups.items():
+        if pos[-1] - pos[0] + 1 == len(pos):
+            index[q] = slice(int(pos[0]), int(pos[-1]) + 1)
+        else:
+            index[q] = pos
+    return index
+
+
+def select_question(df: pd.DataFrame, question_text: str, index: dict = None) -> pd.DataFrame:
+    # Partitioned data (utils/stream.py) reads the question's partition
+    if hasattr(df, "select"):
+        return df.select(question_text)
+
+    # Without an index: full scan over every row
+    if index is None:
+        return df[df["Question"] == question_text].copy()
+
+    rows = index.get(question_text)
+    if rows is None:
+        return df.iloc[0:0].copy()
+    return df.iloc[rows].copy()
+
+
+def load_question(df: pd.DataFrame, question_text: str, index: dict = None) -> pd.DataFrame:
+    return _prepare(df, select_question(df, question_text, index))
+
+
+def load_questions(df: pd.DataFrame, questions: list, index: dict = None) -> pd.DataFrame:
+    """Several questions prepared as one frame (for batched aggregation)."""
+    if hasattr(df, "select"):
+        parts = [df.select(q) for q in questions]
+        qdf = pd.concat(parts, ignore_index=True) if parts else df.select(None)
+    elif index is None:
+        qdf = df[df["Question"].isin(questions)].copy()
+    else:
+        rows = [index[q] for q in questions if q in index]
+        rows = [np.arange(r.start, r.stop) if isinstance(r, slice) else r for r in rows]
+        qdf = df.iloc[np.concatenate(rows) if rows else []].copy()
+    return _prepare(df, qdf)
+
+
+def _prepare(df: pd.DataFrame, qdf: pd.DataFrame) -> pd.DataFrame:
     # Fix numeric
     qdf["Sample_Size"] = pd.to_numeric(qdf["Sample_Size"], errors="coerce")
     qdf["Data_value"] = pd.to_numeric(qdf["Data_value"], errors="coerce")
 
-    # Apply merges
-    qdf = apply_all_merges(qdf)
+    # Apply merges (already done at ingest for the cached dataset)
+    if df.attrs.get("merge_rules") != MERGE_RULES_VERSION:
+        with stage("merges", rows=len(qdf)):
+            qdf = apply_all_merges(qdf)
 
     # Remove national rows (US)
     if "Locationabbr" in qdf:
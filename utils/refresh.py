@@ -0,0 +1,318 @@
+# utils/refresh.py — incremental refresh when CDC publishes new data
+#
+#   python -m utils.refresh path/to/new_or_delta.csv [path/to/base.csv]
+#
+# The export is compared with the served dataset per (Year, Question)
+# partition. Only partitions whose rows differ are replaced (partitions
+# missing from the export are kept), and only the questions they belong
+# to are re-harmonized and re-aggregated into the cube and option tree.
+#
+# The result is written under a new dataset fingerprint and recorded in
+# the delta log last (utils.ingest.dataset_fingerprint), so a running
+# dashboard swaps to it in one step and keeps its caches for every
+# question that did not change (LiveData / watch below). Files of the
+# replaced fingerprint stay until the next refresh, since dashboards
+# may still be reading them until they swap.
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from utils.backends import DuckDBBackend, PandasBackend, duckdb_source
+from utils.cache import QuestionCache
+from utils.compact import NUMERIC_COLS, compact_frame
+from utils.config import (
+    DATA_CSV, CACHE_DIR, CUBE_WORKERS, INGEST_MODE, PANEL_MODE, QUERY_BACKEND,
+    REFRESH_POLL_S
+)
+from utils.cube import assemble_cube, build_cube, cube_path, load_cube
+from utils.figcache import FigureCache
+from utils.ingest import (
+    CATEGORICAL_COLS, ROW_GROUP_ROWS, USECOLS,
+    cache_path, dataset_fingerprint, deltas_path, drop_fingerprints, fingerprint, load_dataset,
+    load_option_tree, read_deltas, read_source_csv,
+    write_option_tree
+)
+from utils.merge_rules import MERGE_RULES_VERSION
+from utils.merges import apply_all_merges
+from utils.options import build_option_tree, merge_option_trees
+from utils.prepare import build_question_index
+from utils.shared import build_lock, load_shared, write_shared
+from utils.stream import load_partitioned
+from utils.years import YearCache
+
+log = logging.getLogger(__name__)
+
+PARTITION_KEYS = ["Year", "Question"]
+
+
+# ----------------------------------------------------------
+# CHANGE DETECTION
+# ----------------------------------------------------------
+def _canonical(df, cols):
+    """
+    df[cols] with dtypes that don't depend on the values: compact_frame
+    downcasts each frame on its own (a year without NaNs may come back as
+    int16 where the served data holds float32), and hashes see the dtype.
+    """
+    out = {}
+    for c in cols:
+        if c in NUMERIC_COLS:
+            out[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+        else:
+            s = df[c].astype(object)
+            out[c] = s.where(s.notna(), None)
+    return pd.DataFrame(out).reset_index(drop=True)
+
+
+def partition_digests(df):
+    """Order-insensitive content hash and row count per (Year, Question)."""
+    rows = _canonical(df, [c for c in USECOLS if c in df])
+    hashes = pd.util.hash_pandas_object(rows, index=False)
+    keys = rows[PARTITION_KEYS].assign(hash=hashes.to_numpy())
+    return keys.groupby(PARTITION_KEYS, observed=True, dropna=False)["hash"].agg(["sum", "size"])
+
+
+def changed_partitions(df, delta):
+    """(Year, Question) partitions of delta that are new or differ from df."""
+    new = partition_digests(delta)
+    current = partition_digests(df[df["Question"].isin(delta["Question"].unique())])
+    current = current.reindex(new.index, fill_value=0)   # new partition → size 0
+    differs = (current["sum"] != new["sum"]) | (current["size"] != new["size"])
+    return new.index[differs.to_numpy()]
+
+
+def _in_partitions(df, partitions):
+    # partitions come from partition_digests: keys in canonical dtypes
+    return pd.MultiIndex.from_frame(_canonical(df, PARTITION_KEYS)).isin(partitions)
+
+
+def replace_partitions(df, delta, partitions):
+    """df with the given partitions replaced by the rows of delta."""
+    merged = pd.concat(
+        [df[~_in_partitions(df, partitions)], delta[_in_partitions(delta, partitions)]],
+        ignore_index=True
+    )
+    for c in CATEGORICAL_COLS:
+        if c in merged:
+            merged[c] = merged[c].astype("category").cat.remove_unused_categories()
+    merged = compact_frame(merged).sort_values("Question", kind="stable", ignore_index=True)
+    merged.attrs["merge_rules"] = MERGE_RULES_VERSION
+    return merged
+
+
+def _without_questions(tree, questions):
+    classes = {}
+    for c, topics in tree["classes"].items():
+        for t, qs in topics.items():
+            kept = [q for q in qs if q not in questions]
+            if kept:
+                classes.setdefault(c, {})[t] = kept
+    panels = {q: p for q, p in tree["panels"].items() if q not in questions}
+    return {"classes": classes, "panels": panels, "years": tree.get("years", [])}
+
+
+# ----------------------------------------------------------
+# REFRESH
+# ----------------------------------------------------------
+def refresh(delta_csv, csv_path=DATA_CSV, cache_dir=CACHE_DIR, workers=CUBE_WORKERS):
+    """
+    Apply a new or delta export on top of the served dataset.
+    Returns the sorted list of questions that changed.
+    """
+    if INGEST_MODE == "stream":
+        raise ValueError("Incremental refresh needs BRFSS_INGEST_MODE=memory")
+
+    old_fp = dataset_fingerprint(csv_path, cache_dir)
+    df = load_dataset(csv_path, cache_dir)
+    tree = load_option_tree(df, csv_path, cache_dir)
+    old_cube = load_cube(csv_path, cache_dir)
+
+    delta = apply_all_merges(read_source_csv(delta_csv))
+    partitions = changed_partitions(df, delta)
+    if partitions.empty:
+        log.info("No changed partitions in %s", delta_csv)
+        return []
+
+    questions = sorted(partitions.get_level_values("Question").unique().tolist())
+    log.info("Refreshing %d partitions of %d questions from %s",
+             len(partitions), len(questions), delta_csv)
+
+    merged = replace_partitions(df, delta, partitions)
+    changed = merged[merged["Question"].isin(questions)].reset_index(drop=True)
+    changed.attrs["merge_rules"] = MERGE_RULES_VERSION
+
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{old_fp}:{fingerprint(delta_csv)}".encode())
+    new_fp = h.hexdigest()
+
+    # Everything under the new fingerprint first ...
+    path = cache_path(csv_path, cache_dir, new_fp)
+    merged.to_parquet(path + ".tmp", index=False, row_group_size=ROW_GROUP_ROWS)
+    os.replace(path + ".tmp", path)
+
+    tree = merge_option_trees([_without_questions(tree, set(questions)),
+                               build_option_tree(changed)])
+    write_option_tree(tree, csv_path, cache_dir, new_fp)
+
+    if old_cube is not None:
+        kept = old_cube.cube[~old_cube.cube["Question"].isin(questions)]
+        cube = assemble_cube([kept, build_cube(changed, workers=workers)])
+        cube = cube.sort_values("Question", kind="stable", ignore_index=True)
+        path = cube_path(csv_path, cache_dir, new_fp)
+        cube.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+
+    # ... then the delta log entry that makes it current
+    deltas = read_deltas(csv_path, cache_dir) + [{
+        "source": os.path.abspath(delta_csv),
+        "fingerprint": new_fp,
+        "partitions": [[None if pd.isna(y) else int(y), q] for y, q in partitions],
+        "questions": questions,
+    }]
+    path = deltas_path(csv_path, cache_dir)
+    with open(path + ".tmp", "w") as f:
+        json.dump(deltas, f)
+    os.replace(path + ".tmp", path)
+
+    # Running apps still serve old_fp until they swap (watch), reading
+    # its files lazily (DuckDB, memory maps): only older data goes now
+    drop_fingerprints(cache_dir, keep={old_fp, new_fp})
+
+    return questions
+
+
+def changed_questions(csv_path, cache_dir, since_fp):
+    """
+    Questions changed by refreshes applied after since_fp, or None if
+    since_fp is not in the delta log (e.g. the CSV itself was replaced).
+    """
+    deltas = read_deltas(csv_path, cache_dir)
+    fps = [fingerprint(csv_path)] + [d["fingerprint"] for d in deltas]
+    if since_fp not in fps:
+        return None
+    start = fps.index(since_fp)
+    return {q for d in deltas[start:] for q in d["questions"]}
+
+
+# ----------------------------------------------------------
+# SERVING (app.py)
+# ----------------------------------------------------------
+class LiveData:
+    """
+    Everything the dashboard serves from one version of the dataset.
+
+    app.py holds a single LiveData and replaces it as a whole when a
+    refresh lands, so a callback sees either the old or the new data,
+    never a mix. Question and figure cache entries of unchanged
+    questions carry over to the new version.
+    """
+
+    def __init__(self, fingerprint, df, index, option_tree, cube,
+                 question_cache, figure_cache, backend, year_cache):
+        self.fingerprint = fingerprint
+        self.df = df
+        self.index = index
+        self.option_tree = option_tree
+        self.cube = cube
+        self.question_cache = question_cache
+        self.figure_cache = figure_cache
+        self.backend = backend
+        self.year_cache = year_cache
+
+    @classmethod
+    def load(cls, csv_path=DATA_CSV, cache_dir=CACHE_DIR, previous=None):
+        fp = dataset_fingerprint(csv_path, cache_dir)
+
+        cube = None
+        if QUERY_BACKEND == "duckdb":
+            # Live panels are SQL over the files on disk (utils/backends.py);
+            # no row-level frame in memory
+            source = duckdb_source(csv_path, cache_dir)
+            df = index = None
+        elif INGEST_MODE == "stream":
+            # Question partitions read on demand (python -m utils.stream)
+            df = load_partitioned(csv_path, cache_dir)
+            index = None
+        elif INGEST_MODE == "shared":
+            # Frame + cube memory-mapped once for every worker (utils/shared.py)
+            df, cube = load_shared(csv_path, cache_dir, cube=PANEL_MODE == "cube")
+            index = None if hasattr(df, "select") else build_question_index(df)
+        else:
+            df = load_dataset(csv_path, cache_dir)
+            index = build_question_index(df)
+
+        # Class → Topic → Question cascade + which panels have data per question
+        option_tree = load_option_tree(df, csv_path, cache_dir)
+
+        # Precomputed panels (python -m utils.cube); None → compute live
+        if PANEL_MODE == "cube" and cube is None:
+            cube = load_cube(csv_path, cache_dir)
+        if PANEL_MODE == "cube" and cube is None:
+            log.warning("No aggregate cube for %s — computing panels live", csv_path)
+
+        stale = None
+        if previous is not None:
+            stale = changed_questions(csv_path, cache_dir, previous.fingerprint)
+        if stale is None:
+            question_cache = QuestionCache(df, index)
+            figure_cache = FigureCache(fp)
+        else:
+            log.info("Keeping cached questions except %d changed ones", len(stale))
+            question_cache = previous.question_cache.successor(df, index, stale)
+            figure_cache = previous.figure_cache.successor(fp, stale)
+
+        if QUERY_BACKEND == "duckdb":
+            backend = DuckDBBackend(source)
+        else:
+            backend = PandasBackend(question_cache)
+
+        # Cumulative per-year sums behind the year-range slider (utils/years.py)
+        if stale is None:
+            year_cache = YearCache(backend)
+        else:
+            year_cache = previous.year_cache.successor(backend, stale)
+
+        return cls(fp, df, index, option_tree, cube, question_cache, figure_cache, backend,
+                   year_cache)
+
+
+def watch(get, swap, csv_path=DATA_CSV, cache_dir=CACHE_DIR, interval=REFRESH_POLL_S):
+    """
+    Poll the dataset fingerprint every interval seconds; on a change,
+    load the new LiveData in the background and hand it to swap().
+    """
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                current = get()
+                if dataset_fingerprint(csv_path, cache_dir) != current.fingerprint:
+                    swap(LiveData.load(csv_path, cache_dir, previous=current))
+            except Exception:
+                log.exception("Dataset refresh failed; still serving %s", get().fingerprint)
+
+    if interval > 0:
+        threading.Thread(target=loop, name="brfss-refresh", daemon=True).start()
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m utils.refresh path/to/new_or_delta.csv [path/to/base.csv]")
+    base = sys.argv[2] if len(sys.argv) > 2 else DATA_CSV
+    if INGEST_MODE == "shared":
+        # Workers that swap to the new data wait on the lock for its
+        # mapped files (utils/shared.py)
+        with build_lock():
+            changed = refresh(sys.argv[1], base)
+            if changed:
+                write_shared(base)
+    else:
+        changed = refresh(sys.argv[1], base)
+    print(f"{len(changed):,} questions refreshed → {cache_path(base)}")
@@ -0,0 +1,209 @@
+# utils/shared.py — one memory-mapped copy of the data for all workers
+#
+# Under a multi-process WSGI server every worker would otherwise parse
+# and hold its own copy of the frame and the cube. Here both are written
+# once as uncompressed Arrow IPC files (question-sorted, with their row
+# index in the schema metadata); every worker memory-maps them, so the
+# pages live once in the OS page cache, and converts only the rows of
+# the question / panel it serves.
+#
+# The files are built in one place, under an fcntl lock in the cache
+# directory: by this CLI (run by gunicorn.conf.py's on_starting before
+# any worker forks) and by the refresh CLI for refreshed data. Workers
+# never build them: one that finds them missing waits for a build in
+# progress, then falls back to the parquet frame / cube.
+#
+#   python -m utils.shared [path/to/brfss.csv]
+#   gunicorn -c gunicorn.conf.py app:server
+import fcntl
+import glob
+import json
+import logging
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from utils.config import DATA_CSV, CACHE_DIR
+from utils.cube import KEY_COLS, PanelCube, cube_path
+from utils.ingest import dataset_fingerprint, drop_fingerprints, load_dataset
+from utils.merge_rules import MERGE_RULES_VERSION
+from utils.prepare import build_question_index
+
+log = logging.getLogger(__name__)
+
+_INDEX_KEY = b"brfss_index"
+_MAPPED = ["frame-*.arrow", "cube-*.arrow"]
+
+
+def frame_path(csv_path, cache_dir=CACHE_DIR, fp=None):
+    fp = fp or dataset_fingerprint(csv_path, cache_dir)
+    return os.path.join(cache_dir, f"frame-{fp}.arrow")
+
+
+def mapped_cube_path(csv_path, cache_dir=CACHE_DIR, fp=None):
+    fp = fp or dataset_fingerprint(csv_path, cache_dir)
+    return os.path.join(cache_dir, f"cube-{fp}.arrow")
+
+
+def _write_ipc(df, index, path):
+    """Uncompressed IPC (mappable) with the row index in the metadata."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[_INDEX_KEY] = json.dumps(index).encode()
+    table = table.replace_schema_metadata(meta)
+
+    # Renamed into place, so a mapper never sees a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+
+
+def _read_ipc(path):
+    table = feather.read_table(path, memory_map=True)
+    return table, json.loads(table.schema.metadata[_INDEX_KEY])
+
+
+# ----------------------------------------------------------
+# BUILD
+# ----------------------------------------------------------
+@contextmanager
+def build_lock(cache_dir=CACHE_DIR, shared=False):
+    """
+    Exclusive lock held while the mapped files are written; shared=True
+    only waits for a build in progress to finish.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, "shared.lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _present(csv_path, cache_dir, fp, cube=True):
+    """Whether the mapped frame and, if a parquet cube exists, the mapped cube are there."""
+    if not os.path.exists(frame_path(csv_path, cache_dir, fp)):
+        return False
+    return not (cube and os.path.exists(cube_path(csv_path, cache_dir, fp))
+                and not os.path.exists(mapped_cube_path(csv_path, cache_dir, fp)))
+
+
+def _replaced(cache_dir, fp):
+    """Fingerprint of the newest other mapped frame: what workers serve until they swap."""
+    frames = [p for p in glob.glob(os.path.join(cache_dir, "frame-*.arrow"))
+              if os.path.basename(p) != f"frame-{fp}.arrow"]
+    if not frames:
+        return None
+    return os.path.basename(max(frames, key=os.path.getmtime))[6:-6]
+
+
+def build_shared(csv_path=DATA_CSV, cache_dir=CACHE_DIR):
+    """Write the mapped files for the current data under the build lock, unless present."""
+    with build_lock(cache_dir):
+        fp = dataset_fingerprint(csv_path, cache_dir)
+        if _present(csv_path, cache_dir, fp):
+            log.info("Shared files for %s already built", fp)
+            return
+        write_shared(csv_path, cache_dir)
+
+
+def write_shared(csv_path=DATA_CSV, cache_dir=CACHE_DIR):
+    """
+    Write the mappable frame (and cube, if one is built) for the current
+    data. Callers hold build_lock.
+    """
+    fp = dataset_fingerprint(csv_path, cache_dir)
+    df = load_dataset(csv_path, cache_dir)
+
+    path = frame_path(csv_path, cache_dir, fp)
+    log.info("Writing shared frame %s", path)
+    index = {q: [rows.start, rows.stop] for q, rows in build_question_index(df).items()}
+    _write_ipc(df, index, path)
+
+    parquet = cube_path(csv_path, cache_dir, fp)
+    if os.path.exists(parquet):
+        cube = pd.read_parquet(parquet)
+        groups = cube.groupby(KEY_COLS, observed=True, sort=False).indices
+        index = [[q, panel, int(pos[0]), int(pos[-1]) + 1]
+                 for (q, panel), pos in groups.items()]
+        path = mapped_cube_path(csv_path, cache_dir, fp)
+        log.info("Writing shared cube %s", path)
+        _write_ipc(cube, index, path)
+
+    # Workers may still map the data this replaces until they swap
+    # (utils.refresh.watch): only older files go now
+    drop_fingerprints(cache_dir, keep={fp, _replaced(cache_dir, fp)}, patterns=_MAPPED)
+
+
+# ----------------------------------------------------------
+# SERVE
+# ----------------------------------------------------------
+class MappedDataset:
+    """
+    Memory-mapped, question-sorted frame. utils.prepare.select_question
+    reads a question through select(), which converts only its rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.table, index = _read_ipc(path)
+        self.index = {q: slice(start, stop) for q, (start, stop) in index.items()}
+        # Rows were harmonized at ingest
+        self.attrs = {"merge_rules": MERGE_RULES_VERSION}
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def select(self, question):
+        rows = self.index.get(question)
+        if rows is None:
+            return self.table.slice(0, 0).to_pandas()
+        return self.table.slice(rows.start, rows.stop - rows.start).to_pandas()
+
+
+class MappedCube(PanelCube):
+    """PanelCube over a memory-mapped cube file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.table, index = _read_ipc(path)
+        self.index = {(q, panel): slice(start, stop) for q, panel, start, stop in index}
+
+    def _take(self, rows, columns):
+        return self.table.slice(rows.start, rows.stop - rows.start).select(columns).to_pandas()
+
+
+def load_shared(csv_path=DATA_CSV, cache_dir=CACHE_DIR, cube=True):
+    """
+    (MappedDataset, MappedCube or None). Missing files are waited for
+    while a build holds the lock, never built here; a frame still
+    missing then is loaded from the parquet cache instead, and a missing
+    cube left to the caller (utils.cube.load_cube).
+    """
+    fp = dataset_fingerprint(csv_path, cache_dir)
+    if not _present(csv_path, cache_dir, fp, cube):
+        with build_lock(cache_dir, shared=True):
+            pass
+
+    path = frame_path(csv_path, cache_dir, fp)
+    if os.path.exists(path):
+        log.info("Mapping shared frame %s", path)
+        dataset = MappedDataset(path)
+    else:
+        log.warning("No shared frame %s (python -m utils.shared) — "
+                    "loading the data into this worker", path)
+        dataset = load_dataset(csv_path, cache_dir)
+    path = mapped_cube_path(csv_path, cache_dir, fp)
+    return dataset, MappedCube(path) if cube and os.path.exists(path) else None
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    src = sys.argv[1] if len(sys.argv) > 1 else DATA_CSV
+    build_shared(src)
+    print(f"Shared files written → {frame_path(src)}")
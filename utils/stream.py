@@ -0,0 +1,317 @@
+# utils/stream.py — chunked ingest for exports larger than RAM
+#
+# The memory ingest (utils/ingest.py) holds the whole CSV as one frame.
+# This path never does: the CSV is read in bounded chunks, each chunk is
+# typed and harmonized (national US/UW rows dropped) and its rows are
+# appended to one of N question-hash partitions (parquet). Every
+# question lands in exactly one partition, so a question — and the
+# cube — can be built from one partition at a time:
+#
+#   python -m utils.stream [path/to/brfss.csv] [memory_mb]
+#
+# The memory budget is approximate: chunk and partition sizes are
+# derived from the in-memory size of a sample of the CSV. The cube is
+# built with one partition in memory per worker, so more workers mean
+# more, smaller partitions; a budget that would need more than
+# _MAX_PARTITIONS partitions is an error, not silently exceeded.
+import glob
+import json
+import logging
+import math
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.compact import CATEGORICAL_COLS, NUMERIC_COLS, USECOLS
+from utils.config import DATA_CSV, CACHE_DIR, CUBE_WORKERS, STREAM_MEMORY_MB
+from utils.cube import assemble_cube, build_cube, cube_path
+from utils.ingest import fingerprint, options_path, write_option_tree
+from utils.merge_rules import MERGE_RULES_VERSION
+from utils.merges import apply_all_merges
+from utils.options import build_option_tree, merge_option_trees
+
+log = logging.getLogger(__name__)
+
+_SAMPLE_ROWS = 5000
+# One open parquet writer per partition while streaming
+_MAX_PARTITIONS = 512
+
+# Share of the budget for one CSV chunk / one partition in memory
+_CHUNK_SHARE = 0.25
+_PARTITION_SHARE = 0.5
+
+
+def partition_dir(csv_path, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f"stream-{fingerprint(csv_path)}")
+
+
+def _manifest_path(part_dir):
+    return os.path.join(part_dir, "manifest.json")
+
+
+# ----------------------------------------------------------
+# SIZING
+# ----------------------------------------------------------
+def plan_chunks(csv_path, memory_mb=STREAM_MEMORY_MB, workers=1):
+    """
+    (rows per CSV chunk, number of partitions) for a memory budget, with
+    workers partitions in memory at once during the cube build. Raises
+    ValueError if the budget would need more than _MAX_PARTITIONS.
+    """
+    budget = memory_mb * 2**20
+    size = os.path.getsize(csv_path)
+
+    sample = pd.read_csv(csv_path, nrows=_SAMPLE_ROWS, low_memory=False)
+    if sample.empty:
+        return _SAMPLE_ROWS, 1
+
+    # CSV bytes / row → row count; full-width object frame bytes / row
+    # → memory per row while parsing (a conservative upper bound for
+    # the typed columns we keep)
+    with open(csv_path, "rb") as f:
+        head = sum(len(next(f, b"")) for _ in range(len(sample) + 1))
+    csv_row = max(head / (len(sample) + 1), 1)
+    mem_row = sample.memory_usage(deep=True).sum() / len(sample)
+
+    rows = size / csv_row
+    chunk_rows = max(1000, int(budget * _CHUNK_SHARE / mem_row))
+    n_parts = max(math.ceil(rows * mem_row * max(workers, 1) / (budget * _PARTITION_SHARE)), 1)
+    if n_parts > _MAX_PARTITIONS:
+        raise ValueError(
+            f"{memory_mb:g} MB for {max(workers, 1)} worker(s) needs {n_parts} partitions "
+            f"of {csv_path} (at most {_MAX_PARTITIONS}); raise the memory budget "
+            f"or lower the number of workers"
+        )
+    return chunk_rows, n_parts
+
+
+def _partition_of(questions, n_parts):
+    hashes = pd.util.hash_pandas_object(questions.astype(str), index=False)
+    return (hashes.to_numpy() % np.uint64(n_parts)).astype(np.int64)
+
+
+# ----------------------------------------------------------
+# CSV CHUNKS → QUESTION PARTITIONS
+# ----------------------------------------------------------
+def _schema(columns):
+    return pa.schema([
+        (c, pa.string() if c in CATEGORICAL_COLS else
+            pa.int16() if c == "Year" else pa.float64())
+        for c in columns
+    ])
+
+
+def _prepare_chunk(chunk):
+    """Same typing and harmonization as read_source_csv + build_cache."""
+    for c in NUMERIC_COLS:
+        if c in chunk:
+            chunk[c] = pd.to_numeric(chunk[c], errors="coerce")
+    if "Year" in chunk:
+        chunk["Year"] = chunk["Year"].astype("Int16")
+    return apply_all_merges(chunk)
+
+
+def _to_table(chunk, schema):
+    cols = {}
+    for field in schema:
+        s = chunk[field.name]
+        if field.name in CATEGORICAL_COLS:
+            s = s.astype(object).where(s.notna(), None)
+        cols[field.name] = pa.array(s, type=field.type, from_pandas=True)
+    return pa.table(cols, schema=schema)
+
+
+def stream_ingest(csv_path=DATA_CSV, cache_dir=CACHE_DIR,
+                  memory_mb=STREAM_MEMORY_MB, workers=CUBE_WORKERS):
+    """
+    Partition the CSV, then build the option tree and the aggregate
+    cube from it. Returns the PartitionedDataset.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    part_dir = partition_dir(csv_path, cache_dir)
+    chunk_rows, n_parts = plan_chunks(csv_path, memory_mb, workers)
+    log.info("Streaming %s → %s (%d-row chunks, %d partitions)",
+             csv_path, part_dir, chunk_rows, n_parts)
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    usecols = [c for c in USECOLS if c in header]
+    schema = _schema(usecols)
+
+    tmp_dir = part_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    writers = {}
+    tree = None
+    questions = {}
+    n_rows = 0
+    try:
+        reader = pd.read_csv(
+            csv_path,
+            usecols=usecols,
+            dtype={c: "category" for c in CATEGORICAL_COLS if c in usecols},
+            chunksize=chunk_rows,
+            low_memory=False
+        )
+        for chunk in reader:
+            chunk = _prepare_chunk(chunk)
+            # Merged as we go: one running tree, not one per chunk
+            chunk_tree = build_option_tree(chunk)
+            tree = chunk_tree if tree is None else merge_option_trees([tree, chunk_tree])
+
+            # National rows never reach a panel (aggregation.partial_sums)
+            chunk = chunk[chunk["Question"].notna() & ~chunk["Locationabbr"].isin(["US", "UW"])]
+            n_rows += len(chunk)
+            parts = _partition_of(chunk["Question"], n_parts)
+            for p in np.unique(parts):
+                rows = chunk[parts == p]
+                if p not in writers:
+                    path = os.path.join(tmp_dir, f"part-{p:03d}.parquet")
+                    writers[p] = pq.ParquetWriter(path, schema)
+                writers[p].write_table(_to_table(rows, schema))
+                for q in rows["Question"].unique().tolist():
+                    questions[q] = int(p)
+    finally:
+        for w in writers.values():
+            w.close()
+
+    # The manifest marks a complete partition set
+    with open(_manifest_path(tmp_dir), "w") as f:
+        json.dump({"partitions": n_parts, "rows": n_rows,
+                   "columns": usecols, "questions": questions}, f)
+    shutil.rmtree(part_dir, ignore_errors=True)
+    os.replace(tmp_dir, part_dir)
+
+    write_option_tree(merge_option_trees([tree] if tree else []), csv_path, cache_dir)
+    dataset = PartitionedDataset(part_dir)
+    build_partitioned_cube(dataset, csv_path, cache_dir, workers)
+
+    # Drop partitions / caches of older source files
+    for pattern, keep in [("stream-*", part_dir),
+                          ("options-*.json", options_path(csv_path, cache_dir))]:
+        for old in glob.glob(os.path.join(cache_dir, pattern)):
+            if old == keep:
+                continue
+            if os.path.isdir(old):
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.remove(old)
+
+    return dataset
+
+
+_dataset = {}
+
+
+def _worker_init(part_dir):
+    _dataset["parts"] = PartitionedDataset(part_dir)
+
+
+def _partition_cube(part):
+    return build_cube(_dataset["parts"].read_partition(part))
+
+
+def build_partitioned_cube(dataset, csv_path=DATA_CSV, cache_dir=CACHE_DIR,
+                           workers=CUBE_WORKERS):
+    """
+    Aggregate cube built one partition at a time (same table as
+    build_cube_file); with workers > 1, one process pool works through
+    the partitions, each worker reading and aggregating whole partitions.
+    """
+    path = cube_path(csv_path, cache_dir)
+    parts = sorted(dataset.paths)
+    log.info("Building aggregate cube %s from %d partitions (%d workers)",
+             path, len(parts), workers)
+
+    if workers > 1 and len(parts) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_worker_init,
+            initargs=(dataset.part_dir,)
+        ) as pool:
+            cubes = list(pool.map(_partition_cube, parts))
+    else:
+        cubes = [build_cube(dataset.read_partition(p)) for p in parts]
+    cube = assemble_cube([c for c in cubes if not c.empty])
+    cube = cube.sort_values("Question", kind="stable", ignore_index=True)
+
+    tmp = path + ".tmp"
+    cube.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+    for old in glob.glob(os.path.join(cache_dir, "cube-*.parquet")):
+        if old != path:
+            os.remove(old)
+    return cube
+
+
+# ----------------------------------------------------------
+# SERVE
+# ----------------------------------------------------------
+class PartitionedDataset:
+    """
+    Question-partitioned stand-in for the in-memory frame.
+
+    utils.prepare.select_question reads a question through select(), so
+    QuestionCache / load_question work on it unchanged; only the
+    partition holding the question is read.
+    """
+
+    def __init__(self, part_dir):
+        with open(_manifest_path(part_dir)) as f:
+            manifest = json.load(f)
+        self.part_dir = part_dir
+        self.questions = manifest["questions"]
+        self.rows = manifest["rows"]
+        self.columns = manifest["columns"]
+        self.paths = {
+            int(os.path.basename(p)[5:8]): p
+            for p in glob.glob(os.path.join(part_dir, "part-*.parquet"))
+        }
+        # Rows were harmonized at ingest
+        self.attrs = {"merge_rules": MERGE_RULES_VERSION}
+
+    def __len__(self):
+        return self.rows
+
+    def read_partition(self, part, filters=None):
+        """One partition with the same dtypes as the ingest cache."""
+        df = pd.read_parquet(self.paths[part], filters=filters)
+        for c in CATEGORICAL_COLS:
+            if c in df:
+                df[c] = df[c].astype("category")
+        if "Year" in df:
+            year = df["Year"]
+            df["Year"] = year.astype("int16") if year.notna().all() else year.astype("float64")
+        df = df.sort_values("Question", kind="stable", ignore_index=True)
+        df.attrs["merge_rules"] = MERGE_RULES_VERSION
+        return df
+
+    def select(self, question):
+        part = self.questions.get(question)
+        if part is None:
+            return pd.DataFrame(columns=self.columns)
+        return self.read_partition(part, [("Question", "==", question)])
+
+
+def load_partitioned(csv_path=DATA_CSV, cache_dir=CACHE_DIR, memory_mb=STREAM_MEMORY_MB):
+    """Partitions for the current CSV, streamed from it first if missing."""
+    part_dir = partition_dir(csv_path, cache_dir)
+    if os.path.exists(_manifest_path(part_dir)):
+        log.info("Loading partitions %s", part_dir)
+        return PartitionedDataset(part_dir)
+    return stream_ingest(csv_path, cache_dir, memory_mb)
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    src = sys.argv[1] if len(sys.argv) > 1 else DATA_CSV
+    mb = float(sys.argv[2]) if len(sys.argv) > 2 else STREAM_MEMORY_MB
+    out = stream_ingest(src, memory_mb=mb)
+    print(f"{len(out):,} rows in {len(out.paths)} partitions → {out.part_dir}")
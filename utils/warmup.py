@@ -0,0 +1,174 @@
+# utils/warmup.py — predictive cache warming
+#
+# A few dozen questions get most of the views, and the first user to
+# pick a question pays for load_question + panels + figures. AccessLog
+# counts question selections and merges them into access-counts.json in
+# the cache directory (summed over workers and restarts); app.py uses it
+# to warm the BRFSS_WARM_TOP_N most-viewed questions once data is ready,
+# and prefetches the questions of a Topic as soon as a user opens it.
+#
+# Warm-ups run on BRFSS_WARM_WORKERS background threads fed by a bounded
+# queue (BRFSS_WARM_QUEUE; when it is full the task furthest from
+# running is dropped). A worker starts a task only while no instrumented
+# callback is running, so warming never competes with an interactive
+# request for more than the one task already under way.
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from utils.config import ACCESS_FLUSH_S, WARM_QUEUE, WARM_WORKERS
+from utils.metrics import background, in_flight, stage
+
+log = logging.getLogger(__name__)
+
+IDLE_POLL_S = 0.05
+
+
+class AccessLog:
+    """Question view counts, persisted (and merged across workers) at path."""
+
+    def __init__(self, path, flush_s=ACCESS_FLUSH_S):
+        self.path = path
+        self.flush_s = flush_s
+        self._lock = threading.Lock()
+        self._pending = Counter()       # views not yet merged into the file
+        self._counts = Counter(self._read())
+        self._flushed = time.monotonic()
+        atexit.register(self.flush)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, question):
+        """Count one view; True when the counts are due to be flushed."""
+        with self._lock:
+            self._pending[question] += 1
+            self._counts[question] += 1
+            return time.monotonic() - self._flushed >= self.flush_s
+
+    def flush(self):
+        """Add this worker's new views to the file, and pick up the other workers'."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._flushed = time.monotonic()
+        if not pending:
+            return
+
+        # Read-add-replace: views of workers flushing at the same moment
+        # may be lost, which only blurs a popularity ranking
+        merged = Counter(self._read())
+        merged.update(pending)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(merged, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.warning("Access counts not saved (%s): %s", self.path, e)
+            return
+        with self._lock:
+            self._counts = merged + self._pending
+
+    def top(self, n):
+        """The n most-viewed questions."""
+        with self._lock:
+            return [q for q, _ in self._counts.most_common(n)]
+
+
+class Warmer:
+    """
+    Bounded background queue of warm-up tasks, keyed so a task already
+    pending is not queued twice.
+    """
+
+    def __init__(self, workers=WARM_WORKERS, max_pending=WARM_QUEUE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._tasks = OrderedDict()     # key -> fn, next task first
+        self._cond = threading.Condition()
+        self._threads = []
+
+        self.submitted = 0
+        self.done = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def submit(self, key, fn, front=False):
+        """Queue fn() under key; front=True runs it before the other pending tasks."""
+        with self._cond:
+            if key in self._tasks:
+                if front:
+                    self._tasks.move_to_end(key, last=False)
+                return
+            self._tasks[key] = fn
+            if front:
+                self._tasks.move_to_end(key, last=False)
+            while len(self._tasks) > self.max_pending:
+                self._tasks.popitem(last=True)     # furthest from running
+                self.dropped += 1
+            self.submitted += 1
+            self._start()
+            self._cond.notify()
+
+    def submit_many(self, tasks, front=False):
+        """Queue (key, fn) pairs, run in the given order."""
+        tasks = list(tasks)
+        for key, fn in reversed(tasks) if front else tasks:
+            self.submit(key, fn, front)
+
+    def _start(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._run, name=f"brfss-warm-{len(self._threads)}",
+                                 daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._tasks:
+                    self._cond.wait()
+            # Interactive callbacks first
+            while in_flight():
+                time.sleep(IDLE_POLL_S)
+            with self._cond:
+                if not self._tasks:
+                    continue
+                key, fn = self._tasks.popitem(last=False)
+
+            try:
+                with background("warmup"), stage("warm"):
+                    fn()
+            except Exception as e:
+                log.debug("Warm-up %r failed: %r", key, e)
+                failed = True
+            else:
+                failed = False
+
+            with self._cond:
+                if failed:
+                    self.errors += 1
+                else:
+                    self.done += 1
+
+    def pending(self):
+        with self._cond:
+            return len(self._tasks)
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "done": self.done,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "pending": self.pending(),
+        }
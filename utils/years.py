@@ -0,0 +1,166 @@
+# utils/years.py — year-range panels from cumulative per-year sums
+#
+# Every panel covers all years; a narrower year range would mean a new
+# groupby per window. Instead, the partial sums of a question
+# (aggregation.partial_sums: persons and true_ss per category, group,
+# Response and Year) are laid out per panel as one row per
+# (group, Response) and one column per year, accumulated along the
+# years. The sums over any window [start, end] are the difference of
+# two columns, and percent + CI follow as in finalize_panel.
+#
+# The arrays of a question are built once per worker from the live
+# backend's partial sums and kept in a bounded LRU (YearCache); the
+# questions of a comparison that are not cached yet come from one
+# batched pass (backend.batch_partials), split by Question.
+# Rows without a Year only count towards the all-years panels.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregation import PANELS, _missing, add_ci
+from utils.config import YEAR_CACHE_QUESTIONS
+from utils.metrics import stage
+
+
+class PanelYears:
+    """Cumulative per-year sums of one panel of one question."""
+
+    def __init__(self, groups, years, persons, ss):
+        self.groups = groups        # group columns + Response, one row per array row
+        self.years = years          # sorted survey years
+        self.persons = persons      # (groups, years + 1), column 0 all zero
+        self.ss = ss
+
+    @classmethod
+    def from_partials(cls, partials, cat_id, group_cols):
+        """None when the panel has no rows with a Year."""
+        keys = group_cols + ["Response"]
+        if partials is None or partials.empty or _missing(partials, keys + ["Year"]):
+            return None
+        df = partials[partials["BreakOutCategoryID"] == cat_id].dropna(subset=keys + ["Year"])
+        if df.empty:
+            return None
+
+        by = list(dict.fromkeys(keys + ["Year"]))    # the temporal panel groups by Year already
+        sums = df.groupby(by, observed=True)[["persons_sum", "ss_sum"]].sum()
+        sums = sums.reset_index()
+        # sums is sorted by keys, so first occurrences follow ngroup's order
+        row = sums.groupby(keys, observed=True).ngroup().to_numpy()
+        groups = sums.drop_duplicates(keys)[keys].reset_index(drop=True)
+        years, col = np.unique(sums["Year"].to_numpy(dtype="int64"), return_inverse=True)
+
+        def cumulative(values):
+            out = np.zeros((len(groups), len(years) + 1))
+            out[row, col + 1] = values
+            return np.cumsum(out, axis=1)
+
+        return cls(groups, years,
+                   cumulative(sums["persons_sum"].to_numpy(dtype="float64")),
+                   cumulative(sums["ss_sum"].to_numpy(dtype="float64")))
+
+    def window(self, start, end):
+        """Same columns as finalize_panel, over the years start..end (inclusive)."""
+        i0 = np.searchsorted(self.years, start, side="left")
+        i1 = np.searchsorted(self.years, end, side="right")
+        group = self.groups.assign(
+            persons_sum=self.persons[:, i1] - self.persons[:, i0],
+            ss_sum=self.ss[:, i1] - self.ss[:, i0]
+        )
+        return add_ci(group).reset_index(drop=True)
+
+
+def question_years(partials):
+    """{panel: PanelYears or None} for every panel in PANELS."""
+    return {
+        panel: PanelYears.from_partials(partials, cat_id, group_cols)
+        for panel, (cat_id, group_cols) in PANELS.items()
+    }
+
+
+class YearCache:
+    """
+    Bounded LRU of question → {panel: PanelYears}, built from the
+    backend's partial sums (utils/backends.py) on first use.
+    """
+
+    def __init__(self, backend, max_questions=YEAR_CACHE_QUESTIONS):
+        self.backend = backend
+        self.max_questions = max_questions
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, question):
+        with self._lock:
+            return question in self._entries
+
+    def window(self, question, panel, start, end):
+        """Summary of panel for the question over the years start..end; empty if no data."""
+        return self.windows([question], panel, start, end)[question]
+
+    def windows(self, questions, panel, start, end):
+        """{question: window summary} for several questions, in order."""
+        entries = self._entries_of(questions)
+        out = {}
+        with stage("year_window") as st:
+            for question, entry in entries.items():
+                years = entry[panel]
+                out[question] = pd.DataFrame() if years is None else years.window(start, end)
+            st["rows"] = sum(len(s) for s in out.values())
+        return out
+
+    def _entries_of(self, questions):
+        questions = list(dict.fromkeys(questions))
+        found, missing = {}, []
+        with self._lock:
+            for q in questions:
+                if q in self._entries:
+                    self._entries.move_to_end(q)
+                    self.hits += 1
+                    found[q] = self._entries[q]
+                else:
+                    self.misses += 1
+                    missing.append(q)
+
+        if missing:
+            with stage("year_sums") as st:
+                if len(missing) == 1:
+                    partials = {missing[0]: self.backend.partial_sums(missing[0])}
+                    st["rows"] = len(partials[missing[0]])
+                else:
+                    # One pass over the rows of every missing question
+                    batch = self.backend.batch_partials(missing)
+                    st["rows"] = len(batch)
+                    partials = {} if batch.empty else {
+                        q: rows.drop(columns="Question")
+                        for q, rows in batch.groupby("Question", observed=True, sort=False)
+                    }
+                built = {q: question_years(partials.get(q)) for q in missing}
+
+            with self._lock:
+                for q, entry in built.items():
+                    self._entries[q] = entry
+                while len(self._entries) > self.max_questions:
+                    self._entries.popitem(last=False)
+            found.update(built)
+
+        return {q: found[q] for q in questions}
+
+    def successor(self, backend, stale=()):
+        """Cache over refreshed data that keeps every question not in stale."""
+        new = YearCache(backend, self.max_questions)
+        with self._lock:
+            for question, entry in self._entries.items():
+                if question not in stale:
+                    new._entries[question] = entry
+        return new
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }